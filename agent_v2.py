@@ -5,10 +5,10 @@ import random
 import json
 import time
 from typing import Union, Tuple, Optional, Dict, Any
+from urllib.parse import quote
 import re # Import regex
 
-import requests
-from bs4 import BeautifulSoup
+import httpx
 from dotenv import load_dotenv
 
 # Importing LangChain components
@@ -16,10 +16,19 @@ from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_google_genai import ChatGoogleGenerativeAI # Keep if needed
 from langchain_core.tools import tool
-from langchain_community.document_loaders import Docx2txtLoader
+from langchain_core.callbacks import BaseCallbackHandler
 from langchain.agents import AgentExecutor, create_openai_tools_agent
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 
+import config
+from cache import extraction_cache, extraction_cache_key
+from docx_text import extract_docx_text
+from generation_profiles import record_token_usage, profile
+from http_client import get_sync_client
+from html_parsing import parse_html
+from main_content import extract_main_content
+from page_cache import fetch_page_sync
+
 # ---------------- Logging Setup ----------------
 logging.basicConfig(
     level=logging.INFO, # Set to INFO for production, DEBUG for detailed tracing
@@ -63,6 +72,15 @@ logging.getLogger("urllib3").setLevel(logging.WARNING) # Quieten requests librar
 #     google_api_key=GEMINI_API_KEY,
 #     # other params...
 # )
+# Chat model used by the extract_job_details tool; `search` creates it from the caller's API key
+llm: Optional[ChatGoogleGenerativeAI] = None
+
+class _AgentTokenLogger(BaseCallbackHandler):
+    """Logs the output tokens of each of the agent's reasoning steps."""
+    def on_llm_end(self, response, **kwargs):
+        for generations in response.generations:
+            for generation in generations:
+                record_token_usage("agent", getattr(generation, "message", None))
 
 # ---------------- Tool Definitions ----------------
 @tool
@@ -82,8 +100,8 @@ def jobsdb_search(keywords: str, location: str = "Hong Kong", page: int = 1) ->
         logger.info(f"Initiating JobsDB search. Keywords: '{keywords}', Location: '{location}', Page: {page}")
 
         # Basic keyword cleaning/encoding
-        kw_param = requests.utils.quote(keywords)
-        loc_param = requests.utils.quote(location)
+        kw_param = quote(keywords)
+        loc_param = quote(location)
 
         # Note: The JobsDB API structure might change. This is based on observed patterns.
         # The 'baseKeywords' seemed less critical than primary keywords in testing, simplifying.
@@ -95,14 +113,13 @@ def jobsdb_search(keywords: str, location: str = "Hong Kong", page: int = 1) ->
         )
         logger.debug(f"Requesting JobsDB URL: {jobsdb_url}")
 
-        # Use a session for potential connection reuse
-        with requests.Session() as session:
-            session.headers.update({ # Add basic headers
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36',
-                'Accept': 'application/json',
-            })
-            response = session.get(jobsdb_url, timeout=25) # Increased timeout
-            response.raise_for_status() # Check for HTTP errors (4xx, 5xx)
+        # Use the shared pooled client so repeated searches reuse connections
+        headers = { # Add basic headers
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36',
+            'Accept': 'application/json',
+        }
+        response = get_sync_client().get(jobsdb_url, headers=headers, timeout=25) # Increased timeout
+        response.raise_for_status() # Check for HTTP errors (4xx, 5xx)
 
         data = response.json()
         jobs_data = data.get("data", [])
@@ -120,13 +137,13 @@ def jobsdb_search(keywords: str, location: str = "Hong Kong", page: int = 1) ->
         # Return full results for the agent to evaluate
         return formatted_jobs
 
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         logger.error(f"Timeout error searching JobsDB for '{keywords}'. URL: {jobsdb_url}")
         return f"Error: Timeout occurred while searching JobsDB for '{keywords}'."
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"HTTP Error searching JobsDB: {e}. URL: {jobsdb_url}")
         # Include status code if available
-        status_code = e.response.status_code if e.response is not None else 'N/A'
+        status_code = e.response.status_code if isinstance(e, httpx.HTTPStatusError) else 'N/A'
         return f"Error: Could not connect to JobsDB or received an error (Status: {status_code}) for '{keywords}': {e}"
     except json.JSONDecodeError as e:
         logger.error(f"JSON Parsing Error for JobsDB response for '{keywords}': {e}. Response text: {response.text[:500]}") # Log start of bad response
@@ -168,28 +185,27 @@ def linkedin_search(keywords: str, location: str = "Hong Kong", num_results: int
             )
             logger.info(f"Constructed LinkedIn URL: {list_url}")
             # Scrape the raw HTML from the constructed URL
-            with requests.Session() as session:
-                user_agents = [
-                    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36 Edg/134.0.3124.95",
-                    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36",
-                ]
-                session.headers.update({ # Add basic headers
-                    'User-Agent': random.choice(user_agents),
-                    'Accept': 'application/json',
-                })
-                response = session.get(list_url, timeout=25) # Increased timeout
-                response.raise_for_status() # Check for HTTP errors (4xx, 5xx)
+            user_agents = [
+                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36 Edg/134.0.3124.95",
+                "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Safari/537.36",
+            ]
+            headers = { # Add basic headers
+                'User-Agent': random.choice(user_agents),
+                'Accept': 'application/json',
+            }
+            response = get_sync_client().get(list_url, headers=headers, timeout=25) # Increased timeout
+            response.raise_for_status() # Check for HTTP errors (4xx, 5xx)
             logger.info(f"Received HTML response from LinkedIn (first 1000 chars): {response.text[:1500] if response.text else 'None'}")
             
-            # Parse the HTML using BeautifulSoup
+            # Parse the HTML with the configured backend (HTML_PARSER)
             try:
-                soup = BeautifulSoup(response.text, 'html.parser')
+                doc = parse_html(response.text)
             except Exception as e:
                 logger.error(f"Error parsing HTML from LinkedIn: {e}")
                 return "Error parsing LinkedIn response."
             
             # Extract job listing containers using the original logic (searching for base-card divs)
-            job_cards = soup.find_all('li')
+            job_cards = doc.select('li')
             logger.debug(f"Found {len(job_cards)} job card elements.")
             if len(job_cards) == 0:
                 logger.warning("No job cards found in LinkedIn response. Ending search.")
@@ -197,7 +213,7 @@ def linkedin_search(keywords: str, location: str = "Hong Kong", num_results: int
             for card in job_cards:
                 # Extract job ID from the card's data attribute
                 try:
-                    data_entity = card.find('div', class_='base-card').get('data-entity-urn')
+                    data_entity = doc.attr(doc.select_one('div.base-card', card), 'data-entity-urn')
                     job_id = data_entity.split(":")[3] if data_entity else "N/A"
                 except Exception as e:
                     logger.debug(f"Failed to extract job ID from card: {e}")
@@ -207,15 +223,15 @@ def linkedin_search(keywords: str, location: str = "Hong Kong", num_results: int
                 job_url = f"https://hk.linkedin.com/jobs/view/{job_id}"
                 
                 # Extract other key information (title, company, location, posted date)
-                title_tag = card.find('span', class_='sr-only')
-                company_tag = card.find('a', class_='hidden-nested-link')
-                location_tag = card.find('span', class_='job-search-card__location')
-                date_tag = card.find('time', class_='job-search-card__listdate')
+                title_tag = doc.select_one('span.sr-only', card)
+                company_tag = doc.select_one('a.hidden-nested-link', card)
+                location_tag = doc.select_one('span.job-search-card__location', card)
+                date_tag = doc.select_one('time.job-search-card__listdate', card)
                 
-                title = title_tag.text.strip() if title_tag else "N/A"
-                company = company_tag.text.strip() if company_tag else "N/A"
-                job_location = location_tag.text.strip() if location_tag else "N/A"
-                posted = date_tag.text.strip() if date_tag else "N/A"
+                title = doc.text(title_tag).strip() if title_tag else "N/A"
+                company = doc.text(company_tag).strip() if company_tag else "N/A"
+                job_location = doc.text(location_tag).strip() if location_tag else "N/A"
+                posted = doc.text(date_tag).strip() if date_tag else "N/A"
 
                 job_info = {
                     "job_id": job_id,
@@ -250,11 +266,11 @@ def linkedin_search(keywords: str, location: str = "Hong Kong", num_results: int
         logger.info(f"Successfully parsed and formatted {len(jobs)} job listings from LinkedIn.")
         return formatted_jobs
     
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         logger.error(f"Timeout occurred during LinkedIn search for keywords: '{keywords}'.")
         return f"Error: Timeout occurred while searching LinkedIn for '{keywords}'."
-    except requests.exceptions.RequestException as e:
-        status_code = e.response.status_code if e.response is not None else 'N/A'
+    except httpx.HTTPError as e:
+        status_code = e.response.status_code if isinstance(e, httpx.HTTPStatusError) else 'N/A'
         logger.error(f"HTTP error during LinkedIn search: {e} (Status code: {status_code}).")
         return f"Error: Could not connect to LinkedIn (Status: {status_code}) for '{keywords}': {e}"
     except Exception as e:
@@ -262,6 +278,31 @@ def linkedin_search(keywords: str, location: str = "Hong Kong", num_results: int
         return f"Error: An unexpected error occurred during LinkedIn search: {e}"
 
 
+# Bump when the extraction prompt in `extract_job_details` changes, so cached extractions are not reused
+EXTRACTION_PROMPT_VERSION = "1"
+
+def _llm_model_name() -> str:
+    """Name of the configured chat model, used in extraction cache keys."""
+    return getattr(llm, "model_name", None) or getattr(llm, "model", "unknown")
+
+def _format_extracted_details(platform: str, job_id: str, url: str, title: str, summary: str) -> str:
+    if title == "Not Found" and summary == "Not Found":
+        logger.warning(f"LLM indicated title and summary not found for {platform.upper()} job {job_id} (URL: {url}). Might be error page or invalid content.")
+        return f"Platform: {platform.upper()}\nJob ID: {job_id}\nStatus: Could not extract title or summary from the job page content (URL: {url}). Content might be invalid or inaccessible."
+    elif title == "Not Found":
+        logger.warning(f"LLM indicated title not found for {platform.upper()} job {job_id}.")
+        title = "[Title Not Found in Content]" # Use clearer status
+    elif summary == "Not Found":
+        logger.warning(f"LLM indicated summary not found for {platform.upper()} job {job_id}.")
+        summary = "[Summary Not Found in Content]" # Use clearer status
+
+    result_str = (f"Platform: {platform.upper()}\n"
+                  f"Job ID  : {job_id}\n"
+                  f"Title   : {title}\n"
+                  f"Summary : {summary}")
+    logger.info(f"Successfully extracted details for {platform.upper()} job ID {job_id}.")
+    return result_str
+
 @tool
 def extract_job_details(job_id: str, platform: str) -> str:
     """
@@ -309,6 +350,14 @@ def extract_job_details(job_id: str, platform: str) -> str:
     else:
         text_to_send = text
 
+    # The same posting is often extracted for many CVs; reuse an earlier extraction of identical text
+    cache = extraction_cache()
+    cache_key = extraction_cache_key(text_to_send, platform, _llm_model_name(), EXTRACTION_PROMPT_VERSION)
+    cached = cache.get(cache_key) if cache is not None else None
+    if cached is not None:
+        logger.info(f"Extraction cache hit for {platform.upper()} job ID {job_id}.")
+        return _format_extracted_details(platform, job_id, url, cached["title"], cached["summary"])
+
     # Consistent prompt for extraction
     prompt_extract = f"""
     Given the following text scraped from a job posting page ({platform.upper()}, Job ID: {job_id}) at URL {url}:
@@ -332,7 +381,8 @@ def extract_job_details(job_id: str, platform: str) -> str:
     try:
         logger.debug(f"Invoking LLM for {platform.upper()} job detail extraction (ID: {job_id}).")
         messages = [HumanMessage(content=prompt_extract)]
-        response = llm.invoke(messages)
+        response = llm.invoke(messages, stop=list(profile("extraction").stop_sequences) or None)
+        record_token_usage("extraction", response)
         response_content = response.content.strip()
 
         logger.debug(f"Raw LLM response for extraction (Job ID: {job_id}):\n{response_content}")
@@ -357,24 +407,11 @@ def extract_job_details(job_id: str, platform: str) -> str:
             details_json = json.loads(json_string)
             title = details_json.get("title", "Extraction Error: Title Key Missing")
             summary = details_json.get("summary", "Extraction Error: Summary Key Missing")
-
-            if title == "Not Found" and summary == "Not Found":
-                logger.warning(f"LLM indicated title and summary not found for {platform.upper()} job {job_id} (URL: {url}). Might be error page or invalid content.")
-                return f"Platform: {platform.upper()}\nJob ID: {job_id}\nStatus: Could not extract title or summary from the job page content (URL: {url}). Content might be invalid or inaccessible."
-            elif title == "Not Found":
-                logger.warning(f"LLM indicated title not found for {platform.upper()} job {job_id}.")
-                title = "[Title Not Found in Content]" # Use clearer status
-            elif summary == "Not Found":
-                logger.warning(f"LLM indicated summary not found for {platform.upper()} job {job_id}.")
-                summary = "[Summary Not Found in Content]" # Use clearer status
-
-
-            result_str = (f"Platform: {platform.upper()}\n"
-                          f"Job ID  : {job_id}\n"
-                          f"Title   : {title}\n"
-                          f"Summary : {summary}")
-            logger.info(f"Successfully extracted details for {platform.upper()} job ID {job_id}.")
-            return result_str
+            # An error or login page yields "Not Found" for both; don't pin that for the cache TTL
+            found = title != "Not Found" or summary != "Not Found"
+            if cache is not None and found and "title" in details_json and "summary" in details_json:
+                cache.set(cache_key, {"title": title, "summary": summary})
+            return _format_extracted_details(platform, job_id, url, title, summary)
 
         except json.JSONDecodeError as json_e:
             error_message = f"Error: Failed to parse JSON response from LLM for {platform.upper()} job {job_id}. Raw response: '{response_content}'. Error: {json_e}"
@@ -411,26 +448,30 @@ def scrape_all_text_original(url: str) -> Optional[str]:
         # Add other headers from your original scrape_all_text if they were different
     }
     try:
-        delay = random.uniform(1.5, 2.0)
-        logger.debug(f"(Original Text Scraper) Scraping URL: {url} (Delay: {delay:.2f}s)")
-        time.sleep(delay)
-        response = requests.get(url, headers=headers, timeout=25) # Adjust timeout
-        response.raise_for_status()
+        logger.debug(f"(Original Text Scraper) Scraping URL: {url}")
+        page = fetch_page_sync(url, headers=headers, timeout=25) # Cached, rate limited per domain
+        if page.from_cache:
+            logger.debug(f"(Original Text Scraper) Served {url} from the page cache")
 
-        content_type = response.headers.get('Content-Type', '').lower()
+        content_type = page.content_type.lower()
         if 'html' not in content_type:
              logger.warning(f"(Original Text Scraper) Non-HTML content type '{content_type}' received from {url}")
              return f"Error: Received non-HTML content ({content_type}) from {url}"
 
-        soup = BeautifulSoup(response.content, 'html.parser')
-
-        # --- Your Original Cleaning Logic Here ---
-        # Example: replicate the cleaning from the *first* version you posted
-        for element in soup(["script", "style", "header", "footer", "nav", "aside"]): # Use the exact tags you had
-             element.decompose()
-        text = soup.get_text(separator='\n', strip=True)
-        # Add any other specific cleaning steps you had in the original scrape_all_text
-        # -----------------------------------------
+        doc = parse_html(page.text) # Backend chosen by HTML_PARSER
+
+        if config.MAIN_CONTENT_EXTRACTION:
+            # Keep only the posting's main content block (drops navigation, banners, related jobs)
+            main = extract_main_content(doc)
+            logger.info(f"(Original Text Scraper) Main content of {url}: kept ~{main.kept_tokens} of ~{main.page_tokens} tokens ({main.tokens_removed} removed)")
+            text = main.text
+        else:
+            # --- Your Original Cleaning Logic Here ---
+            # Example: replicate the cleaning from the *first* version you posted
+            doc.remove(doc.select("script, style, header, footer, nav, aside")) # Use the exact tags you had
+            text = doc.text(separator='\n', strip=True)
+            # Add any other specific cleaning steps you had in the original scrape_all_text
+            # -----------------------------------------
 
         if not text.strip():
              logger.warning(f"(Original Text Scraper) Extracted text from {url} is empty after cleaning.")
@@ -440,13 +481,13 @@ def scrape_all_text_original(url: str) -> Optional[str]:
         logger.debug(f"(Original Text Scraper) Successfully scraped and extracted text from {url} (Length: {len(text)}).")
         return text
 
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         logger.error(f"(Original Text Scraper) Timeout error fetching URL {url}")
         return f"Error: Timeout occurred while trying to fetch {url}"
     # ... add other specific except blocks from your original scrape_all_text ...
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"(Original Text Scraper) Request error fetching URL {url}: {e}")
-        status_code = e.response.status_code if e.response is not None else 'N/A'
+        status_code = e.response.status_code if isinstance(e, httpx.HTTPStatusError) else 'N/A'
         return f"Error: Failed to fetch {url} (Status: {status_code}): {e}"
     except Exception as e:
         logger.error(f"(Original Text Scraper) Unexpected error scraping URL {url}: {e}", exc_info=True)
@@ -531,13 +572,11 @@ def read_cv(cv_file_path: str) -> Optional[str]:
        return None # Indicate wrong file type
     try:
         logger.info(f"Reading CV file from {cv_file_path}")
-        loader = Docx2txtLoader(cv_file_path)
-        docs = loader.load()
-        if not docs:
+        content = extract_docx_text(cv_file_path) # Same extractor as the API, so both see the same text
+        if not content.strip():
             logger.warning(f"No content extracted from CV file: {cv_file_path}")
             return "" # Return empty string if no content
 
-        content = "\n".join(d.page_content for d in docs if hasattr(d, 'page_content'))
         logger.info(f"Successfully read CV file (Length: {len(content)}).")
         return content
     except Exception as e:
@@ -656,21 +695,29 @@ def search(api_key: str, cv_content: str) -> str:
         ]
     )
 
+    global llm
+    agent_llm = ChatGoogleGenerativeAI(
+        model="gemini-2.0-flash-001",
+        **profile("agent").langchain_kwargs(),
+        timeout=None,
+        max_retries=3,
+        google_api_key=api_key,
+        callbacks=[_AgentTokenLogger()],
+    )
+    # The extraction tool only writes a short JSON summary, so it gets the tighter extraction profile
     llm = ChatGoogleGenerativeAI(
         model="gemini-2.0-flash-001",
-        temperature=0,
-        max_tokens=None,
+        **profile("extraction").langchain_kwargs(),
         timeout=None,
         max_retries=3,
         google_api_key=api_key,
-        # other params...
     )
     # Define the tools the agent can use
     tools = [jobsdb_search, linkedin_search, extract_job_details] # Add linkedin_search
 
     # Create the agent
     # Ensure the LLM supports tool calling (OpenAI models generally do)
-    agent = create_openai_tools_agent(llm, tools, prompt)
+    agent = create_openai_tools_agent(agent_llm, tools, prompt)
 
     # Create the AgentExecutor
     agent_executor = AgentExecutor(
@@ -1,18 +1,44 @@
 import os
-from fastapi import FastAPI, HTTPException, File, UploadFile, Form
-from pydantic import BaseModel
-from typing import List, Optional, Union, Dict
+import asyncio
+from dataclasses import dataclass, field
+from contextlib import asynccontextmanager, contextmanager
+from fastapi import FastAPI, HTTPException, File, UploadFile, Form, Query, Request
+from pydantic import BaseModel, model_validator
+from typing import AsyncIterator, Iterator, List, Optional, Tuple, Union, Dict
 from fastapi.middleware.cors import CORSMiddleware
-import google.generativeai as genai
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from google.generativeai import types
-import requests
-from bs4 import BeautifulSoup
-from docx import Document
+import httpx
 import json
 import random
 import time
 import logging
 
+import config
+import evaluation_store
+from evaluation_store import EvaluationStore
+from cv_store import CVStore, cv_id_for
+from docx_text import extract_docx_text
+from pipeline import Done, Stage, run_pipeline
+from http_client import aclose_clients
+from gemini_pool import gemini_pool
+from generation_profiles import record_token_usage, profile
+from metrics import CONTENT_TYPE_LATEST, REQUESTS_IN_PROGRESS, render as render_metrics, stage_timer
+import tracing
+from tracing import Span, span, start_span
+import server_timing
+from server_timing import record_cache_lookup, start_request_timings
+from cache import all_cache_stats, cache_key, evaluation_cache, extraction_cache, extraction_cache_key, page_cache_store
+from page_cache import fetch_page, normalize_url
+from singleflight import SingleFlight
+from html_parsing import parse_html
+from main_content import extract_main_content
+from scoring import (
+    BATCH_EVALUATION_SCHEMA, EVALUATION_SCHEMA, FUSED_EVALUATION_SCHEMA,
+    format_evaluation, parse_evaluation, rank_indices, score_fields, strip_json_fences, validate_evaluation,
+)
+
 # --- Setup Logging ---
 logging.basicConfig(
     level=logging.INFO,
@@ -20,16 +46,61 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Generation config (currently not passed to generate_content, but available if needed)
-generation_config = types.GenerationConfig(
-    temperature=0,
-    top_p=0.95,
-    top_k=40,
-    max_output_tokens=1024
-)
+# --- Background Evaluation Workers ---
+async def evaluation_worker(worker_id: int, queue: asyncio.Queue, store: EvaluationStore):
+    """
+    Takes submitted evaluations off `queue` and runs them through the pipeline,
+    saving each result to `store` as soon as it is finished.
+    """
+    while True:
+        evaluation_id, jobs, stages = await queue.get()
+        logger.info(f"Worker {worker_id} starting evaluation {evaluation_id} ({len(jobs)} jobs)")
+        try:
+            await run_in_threadpool(store.set_status, evaluation_id, evaluation_store.RUNNING)
+            # Runs after the submitting request has returned, so each evaluation starts its own trace
+            with span("evaluation", parent=None, evaluation_id=evaluation_id, jobs=len(jobs)):
+                async for index, result in run_jobs(jobs, stages):
+                    await run_in_threadpool(store.add_result, evaluation_id, index, result.model_dump())
+            await run_in_threadpool(store.set_status, evaluation_id, evaluation_store.COMPLETED)
+            logger.info(f"Worker {worker_id} completed evaluation {evaluation_id}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            detail = e.detail if isinstance(e, HTTPException) else f"Error processing jobs: {str(e)}"
+            logger.error(f"Evaluation {evaluation_id} failed: {detail}")
+            await run_in_threadpool(store.set_status, evaluation_id, evaluation_store.FAILED, detail)
+        finally:
+            queue.task_done()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    tracing.configure()
+    store = EvaluationStore(config.EVALUATION_DB_PATH)
+    interrupted = store.mark_interrupted()
+    if interrupted:
+        logger.warning(f"Marked {interrupted} unfinished evaluations as interrupted")
+    cv_store = CVStore(config.CV_DB_PATH)
+    expired = cv_store.delete_unused(config.CV_RETENTION)
+    if expired:
+        logger.info(f"Deleted {expired} CVs unused for more than {config.CV_RETENTION:.0f}s")
+    queue: asyncio.Queue = asyncio.Queue()
+    workers = [asyncio.create_task(evaluation_worker(i, queue, store)) for i in range(config.EVALUATION_WORKERS)]
+    app.state.evaluation_store = store
+    app.state.evaluation_queue = queue
+    app.state.cv_store = cv_store
+    try:
+        yield
+    finally:
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        store.close()
+        cv_store.close()
+        await aclose_clients()
+        tracing.set_exporter(None)
 
 # --- FastAPI App ---
-app = FastAPI(title="CV-Job Matching Service")
+app = FastAPI(title="CV-Job Matching Service", lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # Allows all origins
@@ -38,6 +109,33 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
+class TracingMiddleware:
+    """
+    Wraps every request in a root span. Plain ASGI rather than @app.middleware, so the
+    endpoint runs inside the span's context and a streamed body is included in it.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+        with span(f"{scope['method']} {scope['path']}", parent=None) as request_span:
+            async def send_with_status(message):
+                if message["type"] == "http.response.start":
+                    request_span.set(status_code=message["status"])
+                await send(message)
+            await self.app(scope, receive, send_with_status)
+
+app.add_middleware(TracingMiddleware)
+
+@app.middleware("http")
+async def track_requests_in_progress(request: Request, call_next):
+    # Streaming responses count until their headers are sent, not until the body ends
+    with REQUESTS_IN_PROGRESS.track_inprogress():
+        return await call_next(request)
+
 # --- Pydantic Models ---
 class JobDescription(BaseModel):
     title: str
@@ -55,11 +153,63 @@ class EvaluationResult(BaseModel):
     job_description: str
     job_url: Optional[str] = None
     score_and_explanation: str
+    # Parsed from score_and_explanation; None when the evaluation failed
+    overall_score: Optional[int] = None
+    experience_score: Optional[int] = None
+    skills_score: Optional[int] = None
+    personality_score: Optional[int] = None
+
+    @model_validator(mode="after")
+    def fill_scores(self):
+        if self.overall_score is None:
+            for name, value in score_fields(self.score_and_explanation).items():
+                setattr(self, name, value)
+        return self
 
 class EvaluationResponse(BaseModel):
     evaluations: List[EvaluationResult]
 
+class EvaluationSubmitResponse(BaseModel):
+    evaluation_id: str
+    status: str
+    total: int
+
+class IndexedEvaluationResult(BaseModel):
+    index: int  # Position of the job in the /evaluate response (descriptions first, then URLs)
+    evaluation: EvaluationResult
+
+def ranked(results: List, top_k: Optional[int], score=lambda result: result.overall_score) -> List:
+    """Orders results by overall score, best first with failed evaluations last, keeping the first `top_k`."""
+    return [results[i] for i in rank_indices([score(result) for result in results], top_k)]
+
+class CVResponse(BaseModel):
+    cv_id: str  # SHA-256 of the uploaded file; pass it as `cv_id` to the evaluation endpoints
+    filename: Optional[str] = None
+    characters: int  # Length of the parsed text
+    created_at: float
+    last_used_at: float
+
+class EvaluationStatusResponse(BaseModel):
+    evaluation_id: str
+    status: str  # queued, running, completed, failed or interrupted
+    total: int
+    completed: int
+    error: Optional[str] = None
+    created_at: float
+    updated_at: float
+    results: List[IndexedEvaluationResult]
+
 # --- Utility Functions ---
+@contextmanager
+def observe(stage: str, **attributes) -> Iterator[Span]:
+    """Times `stage` for the latency histogram and the Server-Timing header, and traces it as a span."""
+    start = time.perf_counter()
+    try:
+        with stage_timer(stage), span(stage, **attributes) as current:
+            yield current
+    finally:
+        server_timing.record(stage, time.perf_counter() - start)
+
 def read_cv_from_text(cv_text: str) -> str:
     """
     Returns the provided plain text CV.
@@ -68,14 +218,79 @@ def read_cv_from_text(cv_text: str) -> str:
 
 def read_cv_from_file(cv_file: UploadFile) -> Optional[str]:
     try:
-        doc = Document(cv_file.file)
-        cv_text = "\n".join([para.text for para in doc.paragraphs])
+        with observe("docx_parse", filename=getattr(cv_file, "filename", None)) as parse_span:
+            cv_text = extract_docx_text(cv_file.file) # Streams word/document.xml, including tables
+            parse_span.set(characters=len(cv_text))
         return cv_text
     except Exception as e:
         logger.error(f"Error reading CV file: {e}")
         return None
 
-def scrape_all_text(url: str) -> Optional[str]:
+async def register_cv(cv: UploadFile, store: CVStore, persist: bool = True) -> Tuple[str, str]:
+    """
+    Returns (cv_id, parsed text) for an uploaded CV. A file that was registered before
+    is looked up by content hash instead of being parsed again; otherwise it is parsed
+    and, if `persist` is set, stored under its new ID.
+    """
+    content = await cv.read()
+    cv_id = cv_id_for(content)
+    cv_text = await run_in_threadpool(store.get_text, cv_id)
+    if cv_text is not None:
+        logger.info(f"CV {cv.filename} already registered as {cv_id[:12]}, skipping parse")
+        return cv_id, cv_text
+
+    # Read CV file (parsing is blocking, so do it in the threadpool)
+    await cv.seek(0)
+    try:
+        cv_text = await run_in_threadpool(read_cv_from_file, cv)
+    except Exception as e:
+        logger.error(f"Error reading CV file: {str(e)}")
+        raise HTTPException(status_code=400, detail=f"Error reading CV file: {str(e)}")
+    if not cv_text:
+        logger.error(f"Failed to read CV file: {cv.filename}")
+        raise HTTPException(status_code=400, detail=f"Unable to read CV file: {cv.filename}. Make sure it's a valid .docx file.")
+    logger.info("CV file read successfully")
+    if persist:
+        await run_in_threadpool(store.add, cv_id, cv.filename, cv_text)
+        logger.info(f"Registered CV {cv_id[:12]}")
+    return cv_id, cv_text
+
+async def resolve_cv_text(cv: Optional[UploadFile], cv_id: Optional[str], store: CVStore) -> str:
+    """The CV text for an evaluation request, from an uploaded file or a registered `cv_id`."""
+    if cv_id:
+        cv_text = await run_in_threadpool(store.get_text, cv_id)
+        if cv_text is None:
+            raise HTTPException(status_code=404, detail=f"CV {cv_id} not found. Upload it to POST /cvs first.")
+        logger.info(f"Using registered CV {cv_id[:12]}")
+        return cv_text
+    if cv is None:
+        raise HTTPException(status_code=400, detail="Provide either a CV file or a cv_id")
+    # Only POST /cvs keeps CVs; a one-off upload is parsed unless it was registered before
+    return (await register_cv(cv, store, persist=False))[1]
+
+def html_to_text(content: Union[str, bytes], url: str = "") -> str:
+    with observe("html_parse", parser=config.HTML_PARSER, characters=len(content)) as parse_span:
+        doc = parse_html(content) # Backend chosen by HTML_PARSER
+        if not config.MAIN_CONTENT_EXTRACTION:
+            return doc.text()
+        main = extract_main_content(doc)
+        parse_span.set(page_tokens=main.page_tokens, kept_tokens=main.kept_tokens)
+    logger.info(f"Main content of {url or 'page'}: kept ~{main.kept_tokens} of ~{main.page_tokens} tokens "
+                f"({main.tokens_removed} removed{', no main block found' if main.fallback else ''})")
+    return main.text
+
+# Concurrent requests for the same page or the same extraction share one in-flight call
+scrape_flights = SingleFlight("scrape")
+extraction_flights = SingleFlight("extraction")
+
+async def scrape_all_text(url: str) -> Optional[str]:
+    # The shared scrape runs outside any one request; each caller records the time it waited for it
+    start = time.perf_counter()
+    text, shared = await scrape_flights.do(normalize_url(url), lambda: server_timing.collect_shared(_scrape_all_text(url)))
+    server_timing.record_shared(shared, time.perf_counter() - start, "scrape")
+    return text
+
+async def _scrape_all_text(url: str) -> Optional[str]:
     user_agents = [
         "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/134.0.0.0 Safari/537.36",
         "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_7_2) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4.1 Safari/605.1.15",
@@ -88,21 +303,52 @@ def scrape_all_text(url: str) -> Optional[str]:
         'User-Agent': random.choice(user_agents),
         'Accept-Language': 'en-US,en;q=0.9',
         'Referer': 'https://www.google.com/', # Add a referer
-        'Connection': 'keep-alive',
         'Upgrade-Insecure-Requests': '1'
     }
 
     try:
-        time.sleep(random.uniform(1, 5)) # Add random delay
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'html.parser')
-        return soup.get_text()
-    except requests.exceptions.RequestException as e:
+        with observe("scrape", url=url) as scrape_span:
+            page = await fetch_page(url, headers=headers, timeout=10) # Cached, rate limited per domain, pooled connections
+            scrape_span.set(characters=len(page.text), from_cache=page.from_cache, truncated=page.truncated)
+        if page_cache_store() is not None:
+            record_cache_lookup(page.from_cache)
+        if page.truncated:
+            logger.info(f"Stopped downloading {url} early after {len(page.text)} characters")
+        return await run_in_threadpool(html_to_text, page.text, url)
+    except httpx.HTTPError as e:
         logger.error(f"Error fetching URL {url}: {e}")
         return None
 
-def extract_job_details(text: str, local_model) -> Union[tuple, str]:
+def model_name(local_model) -> str:
+    return getattr(local_model, "model_name", config.GEMINI_MODEL_NAME)
+
+# Bump when the extraction prompt below changes, so titles and details from the old prompt are not reused
+EXTRACTION_PROMPT_VERSION = "1"
+# The service's extraction prompt is the same for every job board, so cached extractions are shared across them
+EXTRACTION_PLATFORM = "any"
+
+EXTRACTION_CONFIG = profile("extraction").config()
+
+async def extract_job_details(text: str, local_model) -> Union[tuple, str]:
+    cache = extraction_cache()
+    key = extraction_cache_key(text, EXTRACTION_PLATFORM, model_name(local_model), EXTRACTION_PROMPT_VERSION)
+    cached = await run_in_threadpool(cache.get, key) if cache is not None else None
+    if cache is not None:
+        record_cache_lookup(cached is not None)
+    if cached is not None:
+        logger.info("Extraction cache hit")
+        return tuple(cached)
+    # Callers with other API keys may join this call and share its extraction. An error may come from the
+    # starting caller's key (e.g. an invalid one), so joiners that get one retry with their own model.
+    start = time.perf_counter()
+    job_data, shared = await extraction_flights.do(
+        key, lambda: server_timing.collect_shared(_extract_job_details(text, local_model, key)),
+        retry_if=lambda result: isinstance(result[0], str),
+    )
+    server_timing.record_shared(shared, time.perf_counter() - start, "extraction_llm")
+    return job_data
+
+async def _extract_job_details(text: str, local_model, key: str) -> Union[tuple, str]:
     prompt = f"""
     You are given a text describing a position (job requirements, responsibilities, etc.):
 
@@ -135,7 +381,9 @@ def extract_job_details(text: str, local_model) -> Union[tuple, str]:
     """
 
     try:
-        response = local_model.generate_content(prompt)
+        with observe("extraction_llm", prompt_characters=len(prompt)):
+            response = await local_model.generate_content_async(prompt, generation_config=EXTRACTION_CONFIG)
+            record_token_usage("extraction", response)
         response_text = response.text
         title_start_index = response_text.find("Title:")
         detail_start_index = response_text.find("Detail:")
@@ -147,36 +395,64 @@ def extract_job_details(text: str, local_model) -> Union[tuple, str]:
             return f"Error: Could not extract title and detail from response:\n{response_text}"
         
         if title and detail:
+            cache = extraction_cache()
+            if cache is not None:
+                await run_in_threadpool(cache.set, key, [title, detail])
             return (title, detail)
         else:
             return f"Error: Extraction failed. Response:\n{response_text}"
     except Exception as e:
         return f"Error: Failed to call Gemini API: {e}"
 
-def scrape_job_details(url: str, local_model) -> Optional[Dict[str, str]]:
-    content = scrape_all_text(url)
+async def scrape_job_details(url: str, local_model) -> Optional[Dict[str, str]]:
+    content = await scrape_all_text(url)
     if not content:
         return None
-    job_data = extract_job_details(content, local_model)
+    job_data = await extract_job_details(content, local_model)
     if isinstance(job_data, tuple) and len(job_data) == 2:
         return {"title": job_data[0], "description": job_data[1]}
     else:
         logger.error(f"Job data extraction error: {job_data}")
         return None
 
-def evaluate_cv_against_job(cv_text: str, job_title: str, job_description: str, local_model) -> str:
-    prompt = f"""Please evaluate the following CV against the job description using the rubric provided below. Your output must include an overall score out of 100, a breakdown of scores for each category, and a brief explanation for each component. The output must be in JSON format exactly as specified, with no extra commentary.
+# Bump a version when its prompt changes, so cached results from the old prompt are not reused
+EVALUATION_PROMPT_VERSION = "2"
+FUSED_PROMPT_VERSION = "2"
 
-    Job Details and CV Input:
+# Gemini returns JSON matching these schemas; scores are still validated by scoring.py
+EVALUATION_JSON_CONFIG = profile("scoring").config(response_mime_type="application/json", response_schema=EVALUATION_SCHEMA)
+# A fused response holds an extraction and an evaluation, so it gets both stages' output budgets
+FUSED_MAX_OUTPUT_TOKENS = profile("extraction").max_output_tokens + profile("scoring").max_output_tokens
+FUSED_EVALUATION_JSON_CONFIG = profile("scoring").config(
+    FUSED_MAX_OUTPUT_TOKENS, response_mime_type="application/json", response_schema=FUSED_EVALUATION_SCHEMA
+)
 
-    Job Title: {job_title}
-    Job Description:
-    {job_description}
+def batch_evaluation_config(job_count: int) -> types.GenerationConfig:
+    """The scoring profile with one evaluation's output budget per job in the batch."""
+    return profile("scoring").config(
+        profile("scoring").max_output_tokens * job_count,
+        response_mime_type="application/json", response_schema=BATCH_EVALUATION_SCHEMA,
+    )
 
-    CV:
-    {cv_text}
+def evaluation_cache_key(cv_text: str, job_title: str, job_description: str, local_model) -> str:
+    return cache_key("evaluation", EVALUATION_PROMPT_VERSION, model_name(local_model), cv_text, job_title, job_description)
+
+async def lookup_cached_evaluation(cv_text: str, job_title: str, job_description: str, local_model) -> Optional[str]:
+    cache = evaluation_cache()
+    if cache is None:
+        return None
+    # SQLite reads (and the last_access update) stay off the event loop
+    cached = await run_in_threadpool(cache.get, evaluation_cache_key(cv_text, job_title, job_description, local_model))
+    record_cache_lookup(cached is not None)
+    return cached
+
+async def store_cached_evaluation(cv_text: str, job_title: str, job_description: str, local_model, score_and_explanation: str) -> None:
+    cache = evaluation_cache()
+    if cache is None or score_and_explanation.startswith("Error"):
+        return
+    await run_in_threadpool(cache.set, evaluation_cache_key(cv_text, job_title, job_description, local_model), score_and_explanation)
 
-    Evaluation Rubric:
+EVALUATION_RUBRIC = """Evaluation Rubric:
 
     Experience (40 points total)
     Relevance (up to 20 points): How well does the candidate's previous job experience match the responsibilities and requirements stated in the job description?
@@ -196,7 +472,21 @@ def evaluate_cv_against_job(cv_text: str, job_title: str, job_description: str,
     Step 1: Evaluate each category (Experience, Skills, Personality) according to the rubric above.
     Step 2: For each category, assign a score and provide a brief explanation summarizing the key factors that influenced the score.
     Step 3: Sum the scores from all categories to generate the overall score (which must be out of 100 and rounded to a multiple of 5).
-    Step 4: Provide an overall explanation summarizing the candidate's fit for the job based on your evaluation.
+    Step 4: Provide an overall explanation summarizing the candidate's fit for the job based on your evaluation."""
+
+async def evaluate_cv_against_job(cv_text: str, job_title: str, job_description: str, local_model) -> str:
+    prompt = f"""Please evaluate the following CV against the job description using the rubric provided below. Your output must include an overall score out of 100, a breakdown of scores for each category, and a brief explanation for each component. The output must be in JSON format exactly as specified, with no extra commentary.
+
+    Job Details and CV Input:
+
+    Job Title: {job_title}
+    Job Description:
+    {job_description}
+
+    CV:
+    {cv_text}
+
+    {EVALUATION_RUBRIC}
 
     Output Format (JSON):
     {{
@@ -216,23 +506,413 @@ def evaluate_cv_against_job(cv_text: str, job_title: str, job_description: str,
     "overall_explanation": "<overall summary explanation>"
     }}
     """
+    cached = await lookup_cached_evaluation(cv_text, job_title, job_description, local_model)
+    if cached is not None:
+        logger.info(f"Evaluation cache hit for job: {job_title}")
+        return cached
     try:
-        response = local_model.generate_content(prompt)
-        return response.text
+        with observe("evaluation_llm", job_title=job_title, prompt_characters=len(prompt)):
+            response = await local_model.generate_content_async(prompt, generation_config=EVALUATION_JSON_CONFIG)
+            record_token_usage("scoring", response)
+        score_and_explanation = await parse_evaluation_with_repair(response.text, local_model)
     except Exception as e:
         return f"Error calling Gemini API: {e}"
+    await store_cached_evaluation(cv_text, job_title, job_description, local_model, score_and_explanation)
+    return score_and_explanation
 
-# --- FastAPI Endpoint ---
-@app.post("/evaluate", response_model=EvaluationResponse)
-async def evaluate(
-    cv: UploadFile = File(...),
-    job_urls: Optional[str] = Form(None),
-    job_descriptions: Optional[str] = Form(None),
-    api_key: str = Form(...)
-):
+async def parse_evaluation_with_repair(response_text: str, local_model) -> str:
+    """
+    Returns the validated evaluation as JSON text. A malformed response is sent back
+    to the model with the validation error, at most EVALUATION_REPAIR_ATTEMPTS times;
+    the repair prompt carries only the broken output, not the CV or job.
+    """
+    for attempt in range(config.EVALUATION_REPAIR_ATTEMPTS + 1):
+        try:
+            return format_evaluation(parse_evaluation(response_text))
+        except ValueError as e:
+            error = str(e)
+        if attempt == config.EVALUATION_REPAIR_ATTEMPTS:
+            break
+        logger.warning(f"Malformed evaluation ({error}); asking the model to repair it")
+        repair_prompt = f"""The following evaluation does not match the required JSON format: {error}
+
+    Return the same evaluation corrected so that it matches the format exactly: "overall_score" is an integer out of 100, "experience" and "skills" have an integer "score" out of 40, "personality" has an integer "score" out of 20, every section has a string "explanation", and "overall_explanation" is a string. Do not change the assessment itself.
+
+    Evaluation:
+    {response_text}
+    """
+        with observe("evaluation_llm", repair_attempt=attempt + 1, prompt_characters=len(repair_prompt)):
+            response = await local_model.generate_content_async(repair_prompt, generation_config=EVALUATION_JSON_CONFIG)
+            record_token_usage("scoring", response)
+        response_text = response.text
+    return f"Error: Could not parse evaluation response ({error}):\n{response_text}"
+
+def parse_batch_evaluation(response_text: str, job_count: int) -> Optional[List[str]]:
+    """
+    Splits a batched evaluation response into one JSON string per job, ordered by
+    job number. Returns None if the output is not a complete, well-formed array.
+    """
+    try:
+        items = json.loads(strip_json_fences(response_text))
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(items, list) or len(items) != job_count:
+        return None
+
+    by_number = {}
+    for item in items:
+        if not isinstance(item, dict):
+            return None
+        number = item.get("job_number")
+        if not isinstance(number, int) or not 1 <= number <= job_count or number in by_number:
+            return None
+        try:
+            by_number[number] = format_evaluation(validate_evaluation(item))
+        except ValueError:
+            return None
+    return [by_number[number] for number in range(1, job_count + 1)]
+
+async def evaluate_cv_against_jobs(cv_text: str, jobs: List[Tuple[str, str]], local_model) -> List[str]:
+    """
+    Scores several (job_title, job_description) pairs against the CV in one LLM call,
+    sending the CV and rubric only once. If the response is malformed, the batch is
+    split in half and retried, down to single-job calls to evaluate_cv_against_job.
+    """
+    if len(jobs) == 1:
+        return [await evaluate_cv_against_job(cv_text, jobs[0][0], jobs[0][1], local_model)]
+
+    # Only send the jobs that are not cached yet
+    evaluations = list(await asyncio.gather(
+        *(lookup_cached_evaluation(cv_text, job_title, job_description, local_model) for job_title, job_description in jobs)
+    ))
+    missing = [position for position, evaluation in enumerate(evaluations) if evaluation is None]
+    if len(missing) < len(jobs):
+        logger.info(f"Evaluation cache hits for {len(jobs) - len(missing)} of {len(jobs)} batched jobs")
+        if missing:
+            fresh = await evaluate_cv_against_jobs(cv_text, [jobs[position] for position in missing], local_model)
+            for position, evaluation in zip(missing, fresh):
+                evaluations[position] = evaluation
+        return evaluations
+
+    job_sections = "\n\n".join(
+        f"""    Job {number}
+    Job Title: {job_title}
+    Job Description:
+    {job_description}"""
+        for number, (job_title, job_description) in enumerate(jobs, start=1)
+    )
+    prompt = f"""Please evaluate the following CV against each of the {len(jobs)} job descriptions below using the rubric provided below. Score every job independently of the others. For each job your output must include an overall score out of 100, a breakdown of scores for each category, and a brief explanation for each component. The output must be a JSON array exactly as specified, with exactly one object per job, and no extra commentary.
+
+    CV:
+    {cv_text}
+
+    Jobs:
+
+{job_sections}
+
+    {EVALUATION_RUBRIC}
+
+    Output Format (JSON array, one object per job, in job order):
+    [
+    {{
+    "job_number": <number of the job in the list above>,
+    "overall_score": <score out of 100>,
+    "experience": {{
+        "score": <score out of 40>,
+        "explanation": "<brief explanation>"
+    }},
+    "skills": {{
+        "score": <score out of 40>,
+        "explanation": "<brief explanation>"
+    }},
+    "personality": {{
+        "score": <score out of 20>,
+        "explanation": "<brief explanation>"
+    }},
+    "overall_explanation": "<overall summary explanation>"
+    }}
+    ]
+    """
+    batch_config = batch_evaluation_config(len(jobs))
+    try:
+        with observe("evaluation_llm", jobs=len(jobs), prompt_characters=len(prompt)):
+            response = await local_model.generate_content_async(prompt, generation_config=batch_config)
+            record_token_usage("scoring", response, batch_config.max_output_tokens)
+    except Exception as e:
+        return [f"Error calling Gemini API: {e}"] * len(jobs)
+
+    evaluations = parse_batch_evaluation(response.text, len(jobs))
+    if evaluations is not None:
+        await asyncio.gather(*(
+            store_cached_evaluation(cv_text, job_title, job_description, local_model, evaluation)
+            for (job_title, job_description), evaluation in zip(jobs, evaluations)
+        ))
+        return evaluations
+
+    logger.warning(f"Malformed batched evaluation for {len(jobs)} jobs; splitting the batch")
+    middle = len(jobs) // 2
+    first, second = await asyncio.gather(
+        evaluate_cv_against_jobs(cv_text, jobs[:middle], local_model),
+        evaluate_cv_against_jobs(cv_text, jobs[middle:], local_model),
+    )
+    return first + second
+
+def parse_fused_evaluation(response_text: str) -> Optional[Tuple[str, str, str]]:
+    """
+    Splits a fused extract-and-score response into (title, description, score JSON).
+    Returns None if the output is malformed.
+    """
+    try:
+        item = json.loads(strip_json_fences(response_text))
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(item, dict):
+        return None
+    title = item.get("title")
+    description = item.get("description")
+    if not isinstance(title, str) or not isinstance(description, str) or not title.strip() or not description.strip():
+        return None
+    try:
+        evaluation = validate_evaluation(item)
+    except ValueError:
+        return None
+    return (title.strip(), description.strip(), format_evaluation(evaluation))
+
+async def extract_and_evaluate_job(cv_text: str, text: str, local_model) -> Union[tuple, str]:
+    """
+    Fused mode: pulls the job title and summary out of the raw page text and scores
+    the CV against it in a single LLM call. Returns (title, description, score JSON)
+    or an error string, in which case callers fall back to the two-call path.
+    """
+    prompt = f"""You are given the text of a job posting and a candidate's CV. First identify the job, then evaluate the CV against it using the rubric provided below. The output must be in JSON format exactly as specified, with no extra commentary.
+
+    Job Posting Text:
+    {text}
+
+    CV:
+    {cv_text}
+
+    Part 1 - Identify the job:
+    - "title": The recognized job title (for example, "Software Engineer", "Project Manager", "Officer" etc.). Provide only one title; if the text references multiple roles, select the primary one. You may infer the title if there is a clear context. Avoid words like "responsibility", "requirement", "qualification" or "skill" as the title. If no valid title is found, use "Unclear".
+    - "description": A concise summary of the job requirements and responsibilities.
+
+    Part 2 - Evaluate the CV against that job:
+    {EVALUATION_RUBRIC}
+
+    Output Format (JSON):
+    {{
+    "title": "<extracted job title>",
+    "description": "<extracted job requirements and responsibilities>",
+    "overall_score": <score out of 100>,
+    "experience": {{
+        "score": <score out of 40>,
+        "explanation": "<brief explanation>"
+    }},
+    "skills": {{
+        "score": <score out of 40>,
+        "explanation": "<brief explanation>"
+    }},
+    "personality": {{
+        "score": <score out of 20>,
+        "explanation": "<brief explanation>"
+    }},
+    "overall_explanation": "<overall summary explanation>"
+    }}
+    """
+    cache = evaluation_cache()
+    key = cache_key("fused", FUSED_PROMPT_VERSION, model_name(local_model), cv_text, text)
+    if cache is not None:
+        cached = await run_in_threadpool(cache.get, key)
+        record_cache_lookup(cached is not None)
+        if cached is not None:
+            logger.info("Fused evaluation cache hit")
+            return tuple(cached)
+    try:
+        with observe("evaluation_llm", fused=True, prompt_characters=len(prompt)):
+            response = await local_model.generate_content_async(prompt, generation_config=FUSED_EVALUATION_JSON_CONFIG)
+            record_token_usage("scoring", response, FUSED_MAX_OUTPUT_TOKENS)
+    except Exception as e:
+        return f"Error: Failed to call Gemini API: {e}"
+    fused = parse_fused_evaluation(response.text)
+    if fused is None:
+        return f"Error: Could not parse fused extract-and-score response:\n{response.text}"
+    if cache is not None:
+        await run_in_threadpool(cache.set, key, list(fused))
+    return fused
+
+def resolve_max_concurrency(max_concurrency: Optional[int]) -> int:
+    """
+    Returns the number of jobs to evaluate in parallel for one request (or the
+    worker count of one pipeline stage), clamped to 1..MAX_CONCURRENCY_LIMIT.
+    """
+    if max_concurrency is None:
+        max_concurrency = config.MAX_CONCURRENCY
+    return max(1, min(max_concurrency, config.MAX_CONCURRENCY_LIMIT))
+
+@dataclass
+class PipelineJob:
+    """One job travelling through the scrape -> extract -> evaluate pipeline."""
+    idx: int
+    text: Optional[str] = None
+    url: Optional[str] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+    # Trace span covering the job from its first stage until its result is consumed
+    span: Optional[Span] = None
+    # When the job was created or last left a stage; time until the next stage picks it up counts as queueing
+    queued_at: float = field(default_factory=time.perf_counter)
+
+def track_queueing(handler):
+    """Wraps a stage handler (single job or batch) to record how long its jobs waited for it."""
+    async def tracked(value):
+        jobs = value if isinstance(value, list) else [value]
+        now = time.perf_counter()
+        for job in jobs:
+            server_timing.record("queue", now - job.queued_at)
+        try:
+            return await handler(value)
+        finally:
+            now = time.perf_counter()
+            for job in jobs:
+                job.queued_at = now
+    return tracked
+
+def scrape_failed_result(url: str) -> EvaluationResult:
+    logger.error(f"Failed to scrape job details from URL: {url}")
+    return EvaluationResult(
+        job_title="N/A",
+        job_description="N/A",
+        job_url=url,
+        score_and_explanation=f"Error: Unable to scrape job details from {url}"
+    )
+
+# Most jobs whose full scoring budget fits in one response (see batch_evaluation_config)
+MAX_BATCH_SIZE = max(1, config.GEMINI_MAX_OUTPUT_TOKENS // profile("scoring").max_output_tokens)
+
+def resolve_batch_size(batch_size: Optional[int]) -> int:
+    """Returns how many jobs to score per LLM call, clamped to 1..EVALUATION_BATCH_SIZE_LIMIT and MAX_BATCH_SIZE."""
+    if batch_size is None:
+        batch_size = config.EVALUATION_BATCH_SIZE
+    return max(1, min(batch_size, config.EVALUATION_BATCH_SIZE_LIMIT, MAX_BATCH_SIZE))
+
+def build_pipeline_stages(cv_text: str, local_model, scrape_workers: int, extract_workers: int, evaluate_workers: int, batch_size: int = 1, fused: bool = False) -> List[Stage]:
+    async def scrape(job: PipelineJob):
+        job.span = start_span("job", index=job.idx, url=job.url, source="url" if job.url is not None else "description")
+        if job.url is None:
+            return job  # Job descriptions are already text
+        logger.info(f"Processing job URL {job.idx + 1}: {job.url}")
+        with span("scrape_stage", parent=job.span):
+            job.text = await scrape_all_text(job.url)
+        if not job.text:
+            return Done(scrape_failed_result(job.url))
+        return job
+
+    async def extract(job: PipelineJob):
+        if job.url is None:
+            logger.info(f"Processing job description {job.idx + 1}")
+        with span("extract_stage", parent=job.span, characters=len(job.text)):
+            job_detail = await extract_job_details(job.text, local_model)
+        if not isinstance(job_detail, tuple):
+            if job.url is not None:
+                logger.error(f"Job data extraction error: {job_detail}")
+                return Done(scrape_failed_result(job.url))
+            logger.error(f"Missing title or description in job description {job.idx + 1}: {job_detail}")
+            raise HTTPException(status_code=400, detail=f"Job description {job.idx + 1} is missing title or description")
+        job.title, job.description = job_detail
+        return job
+
+    async def evaluate(job: PipelineJob) -> EvaluationResult:
+        with span("evaluate_stage", parent=job.span):
+            score_and_explanation = await evaluate_cv_against_job(cv_text, job.title, job.description, local_model)
+        return EvaluationResult(
+            job_title=job.title,
+            job_description=job.description,
+            job_url=job.url or "",
+            score_and_explanation=score_and_explanation
+        )
+
+    async def evaluate_batch(jobs: List[PipelineJob]) -> List[EvaluationResult]:
+        # One call serves several jobs, so the span hangs off the request rather than any one job
+        with span("evaluate_batch_stage", job_indices=[job.idx for job in jobs]):
+            scores = await evaluate_cv_against_jobs(cv_text, [(job.title, job.description) for job in jobs], local_model)
+        return [
+            EvaluationResult(
+                job_title=job.title,
+                job_description=job.description,
+                job_url=job.url or "",
+                score_and_explanation=score_and_explanation
+            )
+            for job, score_and_explanation in zip(jobs, scores)
+        ]
+
+    async def extract_and_evaluate(job: PipelineJob):
+        if job.url is None:
+            logger.info(f"Processing job description {job.idx + 1}")
+        with span("extract_evaluate_stage", parent=job.span, characters=len(job.text)):
+            fused_result = await extract_and_evaluate_job(cv_text, job.text, local_model)
+        if isinstance(fused_result, tuple):
+            job_title, job_description, score_and_explanation = fused_result
+            return EvaluationResult(
+                job_title=job_title,
+                job_description=job_description,
+                job_url=job.url or "",
+                score_and_explanation=score_and_explanation
+            )
+        logger.warning(f"Fused extract-and-score failed for job {job.idx + 1}, falling back to two calls: {fused_result}")
+        extracted = await extract(job)
+        if isinstance(extracted, Done):
+            return extracted
+        return await evaluate(extracted)
+
+    if fused:
+        return [
+            Stage("scrape", track_queueing(scrape), scrape_workers),
+            Stage("extract_evaluate", track_queueing(extract_and_evaluate), max(extract_workers, evaluate_workers)),
+        ]
+    if batch_size > 1:
+        evaluate_stage = Stage("evaluate", track_queueing(evaluate_batch), evaluate_workers, batch_size=batch_size, batch_linger=config.EVALUATION_BATCH_LINGER)
+    else:
+        evaluate_stage = Stage("evaluate", track_queueing(evaluate), evaluate_workers)
+    return [
+        Stage("scrape", track_queueing(scrape), scrape_workers),
+        Stage("extract", track_queueing(extract), extract_workers),
+        evaluate_stage,
+    ]
+
+async def run_jobs(jobs: List[PipelineJob], stages: List[Stage]) -> AsyncIterator[Tuple[int, EvaluationResult]]:
+    """run_pipeline over `jobs`, ending each job's span as its result comes out."""
+    try:
+        async for index, result in run_pipeline(jobs, stages, queue_size=config.PIPELINE_QUEUE_SIZE or None):
+            job = jobs[index]
+            if job.span is not None:
+                job.span.end(job_title=result.job_title, overall_score=result.overall_score)
+            yield index, result
+    finally:
+        for job in jobs:
+            if job.span is not None and not job.span.ended:
+                job.span.end(error="not completed")
+
+async def prepare_evaluation(
+    cv_store: CVStore,
+    cv: Optional[UploadFile],
+    cv_id: Optional[str],
+    job_urls: Optional[str],
+    job_descriptions: Optional[str],
+    api_key: str,
+    max_concurrency: Optional[int],
+    scrape_workers: Optional[int],
+    extract_workers: Optional[int],
+    evaluate_workers: Optional[int],
+    batch_size: Optional[int] = None,
+    fused: bool = False
+) -> Tuple[List[PipelineJob], List[Stage]]:
+    """
+    Validates an evaluation request and returns the pipeline jobs and stages to run.
+    Raises HTTPException for anything the client has to fix.
+    """
     # Log incoming request details
     logger.info("Received evaluation request")
-    logger.info(f"CV filename: {cv.filename}")
+    logger.info(f"CV filename: {cv.filename}" if cv is not None else f"CV ID: {cv_id}")
     logger.info(f"Job URLs provided: {job_urls is not None}")
     logger.info(f"Job descriptions provided: {job_descriptions is not None}")
     logger.info(f"API key length: {len(api_key) if api_key else 0}")
@@ -242,96 +922,262 @@ async def evaluate(
         logger.error("Invalid API key provided")
         raise HTTPException(status_code=401, detail="Invalid API key")
     
-    # Configure the local Gemini model
+    # Get this key's Gemini model from the pool (no process-global configuration)
     try:
-        genai.configure(api_key=api_key)
-        local_model = genai.GenerativeModel("gemini-2.0-flash")
-        logger.info("Gemini model configured successfully")
+        local_model = gemini_pool.get(api_key)
+        logger.info("Gemini model ready")
     except Exception as e:
         logger.error(f"Error configuring Gemini model: {str(e)}")
         raise HTTPException(status_code=400, detail=f"Error configuring Gemini model: {str(e)}")
 
-    # Read CV file
-    try:
-        cv_text = read_cv_from_file(cv)
-        if not cv_text:
-            logger.error(f"Failed to read CV file: {cv.filename}")
-            raise HTTPException(status_code=400, detail=f"Unable to read CV file: {cv.filename}. Make sure it's a valid .docx file.")
-        logger.info("CV file read successfully")
-    except Exception as e:
-        logger.error(f"Error reading CV file: {str(e)}")
-        raise HTTPException(status_code=400, detail=f"Error reading CV file: {str(e)}")
-
-    evaluations = []
+    cv_text = await resolve_cv_text(cv, cv_id, cv_store)
 
-    # Process job descriptions
+    # Build one pipeline job per input, job descriptions first, then job URLs
+    jobs = []
     if job_descriptions:
         try:
             job_descriptions_list = json.loads(job_descriptions)
-            logger.info(f"Processing {len(job_descriptions_list)} job descriptions")
-            for idx, job in enumerate(job_descriptions_list):
-                logger.info(f"Processing job description {idx + 1}")
-                job_detail = extract_job_details(job, local_model)
-                job_title = job_detail[0]
-                job_description = job_detail[1]
-                job_url = ""
-                
-                if not job_title or not job_description:
-                    logger.error(f"Missing title or description in job description {idx + 1}")
-                    raise HTTPException(status_code=400, detail=f"Job description {idx + 1} is missing title or description")
-                
-                score_and_explanation = evaluate_cv_against_job(cv_text, job_title, job_description, local_model)
-                evaluations.append(EvaluationResult(
-                    job_title=job_title,
-                    job_description=job_description,
-                    job_url=job_url,
-                    score_and_explanation=score_and_explanation
-                ))
         except json.JSONDecodeError as e:
             logger.error(f"Invalid JSON format for job_descriptions: {str(e)}")
             raise HTTPException(status_code=400, detail=f"Invalid JSON format for job_descriptions: {str(e)}")
-        except Exception as e:
-            logger.error(f"Error processing job descriptions: {str(e)}")
-            raise HTTPException(status_code=400, detail=f"Error processing job descriptions: {str(e)}")
+        logger.info(f"Processing {len(job_descriptions_list)} job descriptions")
+        for idx, job in enumerate(job_descriptions_list):
+            jobs.append(PipelineJob(idx=idx, text=job_description_text(job)))
 
-    # Process job URLs
     if job_urls:
         try:
             job_urls_list = json.loads(job_urls)
-            logger.info(f"Processing {len(job_urls_list)} job URLs")
-            for idx, url in enumerate(job_urls_list):
-                logger.info(f"Processing job URL {idx + 1}: {url}")
-                job_detail = scrape_job_details(url, local_model)
-                if job_detail:
-                    score_and_explanation = evaluate_cv_against_job(cv_text, job_detail["title"], job_detail["description"], local_model)
-                    evaluations.append(EvaluationResult(
-                        job_title=job_detail["title"],
-                        job_description=job_detail["description"],
-                        job_url=url,
-                        score_and_explanation=score_and_explanation
-                    ))
-                else:
-                    logger.error(f"Failed to scrape job details from URL: {url}")
-                    evaluations.append(EvaluationResult(
-                        job_title="N/A",
-                        job_description="N/A",
-                        job_url=url,
-                        score_and_explanation=f"Error: Unable to scrape job details from {url}"
-                    ))
         except json.JSONDecodeError as e:
             logger.error(f"Invalid JSON format for job_urls: {str(e)}")
             raise HTTPException(status_code=400, detail=f"Invalid JSON format for job_urls: {str(e)}")
-        except Exception as e:
-            logger.error(f"Error processing job URLs: {str(e)}")
-            raise HTTPException(status_code=400, detail=f"Error processing job URLs: {str(e)}")
+        logger.info(f"Processing {len(job_urls_list)} job URLs")
+        for idx, url in enumerate(job_urls_list):
+            jobs.append(PipelineJob(idx=idx, url=url))
 
-    if not evaluations:
+    if not jobs:
         logger.error("No job descriptions or URLs provided for evaluation")
         raise HTTPException(status_code=400, detail="No job descriptions or URLs provided for evaluation")
 
+    concurrency = resolve_max_concurrency(max_concurrency)
+    stages = build_pipeline_stages(
+        cv_text,
+        local_model,
+        scrape_workers=resolve_max_concurrency(scrape_workers or concurrency),
+        extract_workers=resolve_max_concurrency(extract_workers or concurrency),
+        evaluate_workers=resolve_max_concurrency(evaluate_workers or concurrency),
+        batch_size=resolve_batch_size(batch_size),
+        fused=fused,
+    )
+    logger.info(f"Evaluating {len(jobs)} jobs with stage workers " + ", ".join(f"{stage.name}={stage.workers}" for stage in stages)
+                + f" and evaluation batch size {stages[-1].batch_size}")
+    return jobs, stages
+
+def job_description_text(job) -> str:
+    """
+    The text sent to extraction for one `job_descriptions` item: plain strings as they are,
+    JobDescription-shaped objects as their labelled fields, anything else as JSON.
+    """
+    if isinstance(job, str):
+        return job
+    if isinstance(job, dict) and ("title" in job or "description" in job):
+        return "\n".join(f"{label}: {job[field_name]}" for label, field_name in
+                         (("Title", "title"), ("Description", "description"), ("URL", "job_url")) if job.get(field_name))
+    return json.dumps(job, ensure_ascii=False)
+
+async def stream_evaluation_events(
+    jobs: List[PipelineJob],
+    stages: List[Stage],
+    top_k: Optional[int] = None,
+    timings: Optional[server_timing.RequestTimings] = None
+) -> AsyncIterator[str]:
+    """
+    Yields one NDJSON line per finished job ("result"), then a final "summary" line.
+    Failures after the stream has started are reported as an "error" line, since the
+    HTTP status has already been sent.
+    """
+    start = time.perf_counter()
+    completed = 0
+    scores: List[Optional[int]] = [None] * len(jobs)
+    try:
+        async for index, result in run_jobs(jobs, stages):
+            completed += 1
+            scores[index] = result.overall_score
+            yield json.dumps({"event": "result", "index": index, "evaluation": result.model_dump()}) + "\n"
+    except Exception as e:
+        detail = e.detail if isinstance(e, HTTPException) else f"Error processing jobs: {str(e)}"
+        logger.error(f"Streaming evaluation failed: {detail}")
+        yield json.dumps({"event": "error", "detail": detail}) + "\n"
+        return
+
+    elapsed = time.perf_counter() - start
+    logger.info(f"Successfully streamed {completed} results in {elapsed:.2f}s")
+    yield json.dumps({
+        "event": "summary",
+        "total": len(jobs),
+        "completed": completed,
+        "elapsed_seconds": round(elapsed, 3),
+        "ranking": rank_indices(scores, top_k),
+        # The Server-Timing header went out before any job ran, so the full breakdown comes here
+        "timings_ms": {name: round(ms, 1) for name, ms in timings.milliseconds().items()} if timings else None,
+    }) + "\n"
+
+# --- FastAPI Endpoints ---
+@app.post("/evaluate", response_model=EvaluationResponse)
+async def evaluate(
+    request: Request,
+    response: Response,
+    cv: Optional[UploadFile] = File(None),
+    cv_id: Optional[str] = Form(None),
+    job_urls: Optional[str] = Form(None),
+    job_descriptions: Optional[str] = Form(None),
+    api_key: str = Form(...),
+    max_concurrency: Optional[int] = Form(None),
+    scrape_workers: Optional[int] = Form(None),
+    extract_workers: Optional[int] = Form(None),
+    evaluate_workers: Optional[int] = Form(None),
+    batch_size: Optional[int] = Form(None),
+    fused: bool = Form(False),
+    sort_by_score: bool = Form(False),
+    top_k: Optional[int] = Form(None, ge=1)
+):
+    """
+    Evaluates the CV against every job. Pass the CV either as a .docx `cv` upload or as
+    the `cv_id` returned by POST /cvs. Results are in input order (descriptions first,
+    then URLs) unless `sort_by_score` is set; `top_k` keeps only the best k and implies sorting.
+    The Server-Timing header breaks the time down into CV parse, scrape, LLM and queueing.
+    """
+    timings = start_request_timings()
+    jobs, stages = await prepare_evaluation(
+        request.app.state.cv_store, cv, cv_id, job_urls, job_descriptions, api_key,
+        max_concurrency, scrape_workers, extract_workers, evaluate_workers, batch_size, fused
+    )
+    evaluations: List[Optional[EvaluationResult]] = [None] * len(jobs)
+    try:
+        async for index, result in run_jobs(jobs, stages):
+            evaluations[index] = result
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error processing jobs: {str(e)}")
+        raise HTTPException(status_code=400, detail=f"Error processing jobs: {str(e)}")
+
     logger.info(f"Successfully completed evaluation with {len(evaluations)} results")
+    if sort_by_score or top_k is not None:
+        evaluations = ranked(evaluations, top_k)
+    response.headers["Server-Timing"] = timings.header()
+    # Lets pages on other origins (such as the my-app frontend) read the timings too
+    response.headers["Timing-Allow-Origin"] = "*"
     return EvaluationResponse(evaluations=evaluations)
 
+@app.post("/evaluate/stream")
+async def evaluate_stream(
+    request: Request,
+    cv: Optional[UploadFile] = File(None),
+    cv_id: Optional[str] = Form(None),
+    job_urls: Optional[str] = Form(None),
+    job_descriptions: Optional[str] = Form(None),
+    api_key: str = Form(...),
+    max_concurrency: Optional[int] = Form(None),
+    scrape_workers: Optional[int] = Form(None),
+    extract_workers: Optional[int] = Form(None),
+    evaluate_workers: Optional[int] = Form(None),
+    batch_size: Optional[int] = Form(None),
+    fused: bool = Form(False),
+    top_k: Optional[int] = Form(None, ge=1)
+):
+    """
+    Same inputs as /evaluate, but returns NDJSON: one {"event": "result", "index", "evaluation"}
+    line per job as soon as it finishes, in completion order, then {"event": "summary", ...}.
+    `index` is the job's position in the /evaluate response (descriptions first, then URLs).
+    The summary's "ranking" lists the indices from best to worst score, cut to `top_k`, and
+    "timings_ms" has the same breakdown as /evaluate's Server-Timing header. The header on
+    this response only covers the work done before streaming started, such as the CV parse.
+    """
+    timings = start_request_timings()
+    jobs, stages = await prepare_evaluation(
+        request.app.state.cv_store, cv, cv_id, job_urls, job_descriptions, api_key,
+        max_concurrency, scrape_workers, extract_workers, evaluate_workers, batch_size, fused
+    )
+    return StreamingResponse(
+        stream_evaluation_events(jobs, stages, top_k, timings),
+        media_type="application/x-ndjson",
+        headers={"Server-Timing": timings.header(), "Timing-Allow-Origin": "*"},
+    )
+
+@app.post("/evaluations", response_model=EvaluationSubmitResponse, status_code=202)
+async def submit_evaluation(
+    request: Request,
+    cv: Optional[UploadFile] = File(None),
+    cv_id: Optional[str] = Form(None),
+    job_urls: Optional[str] = Form(None),
+    job_descriptions: Optional[str] = Form(None),
+    api_key: str = Form(...),
+    max_concurrency: Optional[int] = Form(None),
+    scrape_workers: Optional[int] = Form(None),
+    extract_workers: Optional[int] = Form(None),
+    evaluate_workers: Optional[int] = Form(None),
+    batch_size: Optional[int] = Form(None),
+    fused: bool = Form(False)
+):
+    """
+    Same inputs as /evaluate, but queues the evaluation for the background workers
+    and returns its ID straight away. Poll GET /evaluations/{evaluation_id} for progress.
+    """
+    jobs, stages = await prepare_evaluation(
+        request.app.state.cv_store, cv, cv_id, job_urls, job_descriptions, api_key,
+        max_concurrency, scrape_workers, extract_workers, evaluate_workers, batch_size, fused
+    )
+    store: EvaluationStore = request.app.state.evaluation_store
+    evaluation_id = await run_in_threadpool(store.create, len(jobs))
+    await request.app.state.evaluation_queue.put((evaluation_id, jobs, stages))
+    logger.info(f"Queued evaluation {evaluation_id} with {len(jobs)} jobs")
+    return EvaluationSubmitResponse(evaluation_id=evaluation_id, status=evaluation_store.QUEUED, total=len(jobs))
+
+@app.get("/evaluations/{evaluation_id}", response_model=EvaluationStatusResponse)
+async def get_evaluation(evaluation_id: str, request: Request, sort_by_score: bool = False, top_k: Optional[int] = Query(None, ge=1)):
+    """Results finished so far, by job index unless `sort_by_score` or `top_k` asks for the best first."""
+    store: EvaluationStore = request.app.state.evaluation_store
+    evaluation = await run_in_threadpool(store.get, evaluation_id)
+    if evaluation is None:
+        raise HTTPException(status_code=404, detail=f"Evaluation {evaluation_id} not found")
+    response = EvaluationStatusResponse(**evaluation)
+    if sort_by_score or top_k is not None:
+        response.results = ranked(response.results, top_k, score=lambda item: item.evaluation.overall_score)
+    return response
+
+@app.post("/cvs", response_model=CVResponse, status_code=201)
+async def upload_cv(request: Request, cv: UploadFile = File(...)):
+    """
+    Parses and stores a .docx CV once. Evaluation endpoints accept the returned
+    `cv_id` in place of the `cv` file. Uploading the same file again returns the same ID.
+    """
+    store: CVStore = request.app.state.cv_store
+    cv_id, _ = await register_cv(cv, store)
+    return CVResponse(**await run_in_threadpool(store.get, cv_id))
+
+@app.get("/cvs/{cv_id}", response_model=CVResponse)
+async def get_cv(cv_id: str, request: Request):
+    cv = await run_in_threadpool(request.app.state.cv_store.get, cv_id)
+    if cv is None:
+        raise HTTPException(status_code=404, detail=f"CV {cv_id} not found")
+    return CVResponse(**cv)
+
+@app.delete("/cvs/{cv_id}", status_code=204)
+async def delete_cv(cv_id: str, request: Request):
+    if not await run_in_threadpool(request.app.state.cv_store.delete, cv_id):
+        raise HTTPException(status_code=404, detail=f"CV {cv_id} not found")
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return {
+        "caches": await run_in_threadpool(all_cache_stats),
+        "single_flight": [scrape_flights.stats(), extraction_flights.stats()],
+    }
+
+@app.get("/metrics")
+async def metrics():
+    return Response(content=await run_in_threadpool(render_metrics), media_type=CONTENT_TYPE_LATEST)
+
 @app.get("/")
 async def root():
     return {"message": "Hello World"}
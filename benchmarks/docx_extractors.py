@@ -0,0 +1,138 @@
+"""
+Compares CV text extraction from .docx files (see docx_text.py).
+
+Usage (from the repository root):
+    python benchmarks/docx_extractors.py
+    python benchmarks/docx_extractors.py --cv TestCV.docx big_cv.docx --repeat 10
+
+Extractors:
+- "streaming":   docx_text.extract_docx_text, used by the API and the agent
+- "python-docx": paragraphs joined with newlines, what api.py used before
+- "docx2txt":    what the agent's Docx2txtLoader wrapped before
+
+For every CV and extractor it reports the median time, the peak Python memory
+allocated during one extraction (tracemalloc), the number of characters
+returned and whether text from table cells made it into the output. Without
+--cv a large synthetic CV is generated with python-docx: many experience
+paragraphs plus a skills table, the layout python-docx paragraphs miss.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docx_text import extract_docx_text  # noqa: E402
+
+TABLE_MARKER = "TableSkillMarker"
+
+
+def python_docx_text(path: str) -> str:
+    from docx import Document
+    return "\n".join(para.text for para in Document(path).paragraphs)
+
+
+def docx2txt_text(path: str) -> str:
+    import docx2txt
+    return docx2txt.process(path)
+
+
+EXTRACTORS = {
+    "streaming": extract_docx_text,
+    "python-docx": python_docx_text,
+    "docx2txt": docx2txt_text,
+}
+
+
+def available_extractors():
+    available = ["streaming"]
+    for name, module in (("python-docx", "docx"), ("docx2txt", "docx2txt")):
+        try:
+            __import__(module)
+            available.append(name)
+        except ImportError:
+            pass
+    return available
+
+
+def synthesize_cv(path: str, roles: int) -> None:
+    """Writes a CV with `roles` experience sections and a skills table."""
+    from docx import Document
+    document = Document()
+    document.add_heading("Jane Candidate", level=0)
+    document.add_paragraph("Senior Software Engineer - jane@example.com - +852 5555 0000")
+    for i in range(roles):
+        document.add_heading(f"Engineer {i}, Example Corp {i}", level=2)
+        for j in range(4):
+            document.add_paragraph(
+                f"Led project {i}.{j}: designed and shipped a service handling {1000 * (j + 1)} requests per "
+                "second, mentored two engineers and cut infrastructure costs by a fifth.",
+                style="List Bullet",
+            )
+    document.add_heading("Skills", level=1)
+    table = document.add_table(rows=0, cols=3)
+    for i in range(max(roles // 4, 1)):
+        cells = table.add_row().cells
+        cells[0].text = f"{TABLE_MARKER} {i}"
+        cells[1].text = "Python, FastAPI, PostgreSQL"
+        cells[2].text = "5 years"
+    document.save(path)
+
+
+def measure(fn, path: str, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(path)
+        timings.append((time.perf_counter() - start) * 1000)
+    tracemalloc.start()
+    text = fn(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(timings), peak / 1024, text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cv", nargs="+", help=".docx files (default: a generated large CV)")
+    parser.add_argument("--roles", type=int, default=400, help="experience sections in the generated CV")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per CV and extractor")
+    parser.add_argument("--extractors", nargs="+", default=list(EXTRACTORS), choices=EXTRACTORS)
+    args = parser.parse_args()
+
+    installed = available_extractors()
+    extractors = [name for name in args.extractors if name in installed]
+    for name in set(args.extractors) - set(extractors):
+        print(f"Skipping {name}: not installed")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = args.cv
+        if not paths:
+            path = os.path.join(tmp, "synthetic_cv.docx")
+            synthesize_cv(path, args.roles)
+            paths = [path]
+
+        header = f"{'cv':<24} {'size KB':>8} {'extractor':<12} {'median ms':>10} {'peak KB':>9} {'chars':>8} {'tables':>7}"
+        print(header)
+        print("-" * len(header))
+        for path in paths:
+            size_kb = os.path.getsize(path) / 1024
+            baseline_ms = None
+            for name in extractors:
+                median_ms, peak_kb, text = measure(EXTRACTORS[name], path, args.repeat)
+                baseline_ms = baseline_ms or median_ms
+                # Only the generated CV has a known table marker
+                tables = ("yes" if TABLE_MARKER in text else "no") if not args.cv else "-"
+                print(
+                    f"{os.path.basename(path)[:24]:<24} {size_kb:>8.0f} {name:<12} {median_ms:>10.2f} "
+                    f"{peak_kb:>9.0f} {len(text):>8} {tables:>7}"
+                    + (f"  ({median_ms / baseline_ms:.1f}x streaming time)" if name != "streaming" and "streaming" in extractors else "")
+                )
+
+
+if __name__ == "__main__":
+    main()
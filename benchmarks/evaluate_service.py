@@ -0,0 +1,281 @@
+"""
+Load-tests /evaluate offline: the FastAPI app runs in-process, Gemini is replaced
+by a deterministic stub model and job pages come from a local fixture server.
+
+Usage (from the repository root):
+    python benchmarks/evaluate_service.py
+    python benchmarks/evaluate_service.py --concurrency 1 8 32 --requests 100 --jobs 6 --llm-latency 0.5
+    python benchmarks/evaluate_service.py --batch-size 3 --json after.json
+
+Every request uploads the CV (or passes a registered cv_id with --cv-mode id) and
+asks for --jobs pages from benchmarks/fixtures, served by a threaded HTTP server
+on 127.0.0.1 with an optional --site-latency per page. Each request gets its own
+page URLs (a query parameter), so scrapes are not shared between requests unless
+--shared-urls is given. The stub model sleeps --llm-latency seconds plus
+--token-latency per output token, reports --output-tokens and ~4 characters per
+prompt token as usage, and returns well-formed extractions and evaluations.
+
+For each concurrency level (clients sending requests back to back) it reports
+requests per second, p50/p95/p99 latency, failed requests and the peak resident
+set size of the process while that level ran. Caches and tracing are off by
+default so runs measure the cold path; --cache and --trace turn them on. Nothing
+leaves the machine and no API key is needed.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, "benchmarks", "fixtures")
+sys.path.insert(0, ROOT)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16], help="concurrent clients per level")
+    parser.add_argument("--requests", type=int, default=40, help="requests per concurrency level")
+    parser.add_argument("--jobs", type=int, default=4, help="job URLs per request")
+    parser.add_argument("--cv", default=os.path.join(ROOT, "TestCV.docx"), help=".docx CV to evaluate")
+    parser.add_argument("--cv-mode", choices=("upload", "id"), default="upload", help="upload the CV every time or register it once")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="seconds per stub model call")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="extra seconds per output token")
+    parser.add_argument("--output-tokens", type=int, default=300, help="output tokens reported per call")
+    parser.add_argument("--site-latency", type=float, default=0.0, help="seconds the fixture server waits per page")
+    parser.add_argument("--shared-urls", action="store_true", help="use the same page URLs in every request")
+    parser.add_argument("--batch-size", type=int, help="passed to /evaluate")
+    parser.add_argument("--fused", action="store_true", help="passed to /evaluate")
+    parser.add_argument("--cache", action="store_true", help="keep the page, extraction and evaluation caches on")
+    parser.add_argument("--trace", action="store_true", help="write trace spans (to the temporary data directory)")
+    parser.add_argument("--json", help="also write the results to this file")
+    return parser.parse_args()
+
+
+args = parse_args()
+data_dir = tempfile.mkdtemp(prefix="cvhelper-bench-")
+# Settings are read at import time, so they must be in place before api is imported
+os.environ.update({
+    "DATA_DIR": data_dir,
+    "CACHE_ENABLED": "1" if args.cache else "0",
+    "TRACE_EXPORTER": "jsonl" if args.trace else "none",
+    # Every page comes from one local host; the politeness limit would otherwise be all that is measured
+    "SCRAPE_RATE_PER_SECOND": "100000",
+    "SCRAPE_BURST": "100000",
+})
+
+import httpx  # noqa: E402
+
+import api  # noqa: E402
+from scoring import SCORE_LIMITS  # noqa: E402
+
+
+class StubResponse:
+    def __init__(self, text: str, prompt_tokens: int, output_tokens: int):
+        self.text = text
+        self.usage_metadata = SimpleNamespace(prompt_token_count=prompt_tokens, candidates_token_count=output_tokens)
+        self.candidates = [SimpleNamespace(finish_reason=SimpleNamespace(name="STOP"))]
+
+
+class StubModel:
+    """Answers every prompt type api.py sends, deterministically, after a fixed delay."""
+    model_name = "benchmark-stub"
+
+    def __init__(self, latency: float, token_latency: float, output_tokens: int):
+        self.latency = latency
+        self.token_latency = token_latency
+        self.output_tokens = output_tokens
+        self.calls = 0
+
+    @staticmethod
+    def _evaluation(seed: int, **extra) -> Dict:
+        scores = {section: seed % (limit + 1) for section, limit in SCORE_LIMITS.items()}
+        sections = {section: {"score": score, "explanation": f"{section} fit"} for section, score in scores.items()}
+        return {"overall_score": sum(scores.values()), **sections, "overall_explanation": "Stub evaluation", **extra}
+
+    def _answer(self, prompt: str) -> str:
+        seed = zlib.crc32(prompt.encode("utf-8"))
+        if '"job_number"' in prompt:
+            count = prompt.count("Job Title:")
+            return json.dumps([self._evaluation(seed + number, job_number=number) for number in range(1, count + 1)])
+        if "Part 1 - Identify the job" in prompt:
+            return json.dumps(self._evaluation(seed, title=f"Engineer {seed % 97}", description="Builds services."))
+        if "Title: <Extracted Job Title>" in prompt:
+            return f"Title: Engineer {seed % 97}\nDetail: Builds and runs backend services."
+        return json.dumps(self._evaluation(seed))
+
+    async def generate_content_async(self, prompt, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.latency + self.token_latency * self.output_tokens)
+        return StubResponse(self._answer(prompt), len(prompt) // 4, self.output_tokens)
+
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    site_latency = 0.0
+
+    def do_GET(self):
+        if self.site_latency:
+            time.sleep(self.site_latency)
+        super().do_GET()
+
+    def log_message(self, *args):
+        pass
+
+
+def start_fixture_server(site_latency: float) -> ThreadingHTTPServer:
+    handler = type("Handler", (FixtureHandler,), {"site_latency": site_latency})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(handler, directory=FIXTURES))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def current_rss() -> Optional[int]:
+    """Resident set size in bytes, or None where /proc is not available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def max_rss() -> int:
+    """Peak resident set size of the process so far, in bytes."""
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class RssSampler:
+    """Samples RSS from a thread, so a busy event loop does not hide the peak."""
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak = current_rss() or 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss() or 0)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        if not self.peak:  # No /proc: fall back to the process-wide high-water mark
+            self.peak = max_rss()
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+async def run_level(client: httpx.AsyncClient, make_request, concurrency: int, total: int) -> Dict:
+    latencies: List[float] = []
+    failures = 0
+    counter = iter(range(total))
+
+    async def client_loop():
+        nonlocal failures
+        for number in counter:
+            start = time.perf_counter()
+            response = await make_request(client, number)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                failures += 1
+
+    with RssSampler() as rss:
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "failures": failures,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.mean(latencies) * 1000,
+        "peak_rss_mb": rss.peak / 2**20,
+    }
+
+
+async def main():
+    server = start_fixture_server(args.site_latency)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    pages = sorted(name for name in os.listdir(FIXTURES) if name.endswith(".html"))
+    stub = StubModel(args.llm_latency, args.token_latency, args.output_tokens)
+    api.gemini_pool.get = lambda api_key: stub
+    with open(args.cv, "rb") as f:
+        cv_bytes = f.read()
+
+    form = {"api_key": "benchmark"}
+    if args.batch_size:
+        form["batch_size"] = str(args.batch_size)
+    if args.fused:
+        form["fused"] = "true"
+
+    def job_urls(number: int) -> str:
+        urls = [f"{base}/{pages[i % len(pages)]}" for i in range(args.jobs)]
+        if not args.shared_urls:
+            urls = [f"{url}?request={number}&job={i}" for i, url in enumerate(urls)]
+        return json.dumps(urls)
+
+    async with api.lifespan(api.app):
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+            if args.cv_mode == "id":
+                registered = await client.post("/cvs", files={"cv": ("cv.docx", cv_bytes)})
+                registered.raise_for_status()
+                form["cv_id"] = registered.json()["cv_id"]
+
+            async def make_request(client: httpx.AsyncClient, number: int) -> httpx.Response:
+                files = {"cv": ("cv.docx", cv_bytes)} if args.cv_mode == "upload" else None
+                return await client.post("/evaluate", data={**form, "job_urls": job_urls(number)}, files=files)
+
+            warmup = await make_request(client, -1)
+            if warmup.status_code != 200:
+                sys.exit(f"Warm-up request failed with {warmup.status_code}: {warmup.text[:500]}")
+
+            print(f"{args.jobs} jobs per request, stub LLM {args.llm_latency * 1000:.0f} ms + {args.token_latency * 1000:.1f} ms/token "
+                  f"x {args.output_tokens} tokens, site latency {args.site_latency * 1000:.0f} ms, "
+                  f"cache {'on' if args.cache else 'off'}, tracing {'on' if args.trace else 'off'}")
+            header = f"{'clients':>8} {'requests':>9} {'failed':>7} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'peak RSS MB':>12}"
+            print(header)
+            print("-" * len(header))
+            results = []
+            for concurrency in args.concurrency:
+                result = await run_level(client, make_request, concurrency, args.requests)
+                results.append(result)
+                print(f"{concurrency:>8} {result['requests']:>9} {result['failures']:>7} {result['rps']:>8.2f} {result['p50_ms']:>9.1f} "
+                      f"{result['p95_ms']:>9.1f} {result['p99_ms']:>9.1f} {result['peak_rss_mb']:>12.1f}")
+    server.shutdown()
+    shutil.rmtree(data_dir, ignore_errors=True)
+    print(f"Stub model calls: {stub.calls}; process peak RSS: {max_rss() / 2**20:.1f} MB")
+
+    if args.json:
+        settings = {key: value for key, value in vars(args).items() if key != "json"}
+        with open(args.json, "w") as f:
+            json.dump({"settings": settings, "results": results}, f, indent=2)
+        print(f"Wrote {args.json}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
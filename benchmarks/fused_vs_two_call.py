@@ -0,0 +1,123 @@
+"""
+Compares the fused extract-and-score prompt with the two-call path
+(extract_job_details + evaluate_cv_against_job) on real job pages.
+
+Usage (from the repository root):
+    GEMINI_API_KEY=... python benchmarks/fused_vs_two_call.py --cv TestCV.docx --urls urls.json --repeat 3
+
+Every URL is scraped once up front and the same page text is fed to both paths,
+so the numbers only cover LLM round trips: wall-clock latency per job and the
+prompt/output tokens reported by Gemini. Caches are turned off and the service's
+data files go to a temporary directory, so every repeat makes real LLM calls.
+This calls the real API and is billed.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Settings are read at import time; cached extractions and evaluations would answer both paths for free
+os.environ.update({"CACHE_ENABLED": "0", "DATA_DIR": tempfile.mkdtemp(prefix="cvhelper-bench-")})
+
+import api  # noqa: E402
+from gemini_pool import gemini_pool  # noqa: E402
+
+
+class TokenCountingModel:
+    """Wraps a GenerativeModel and adds up the usage metadata of every call."""
+    def __init__(self, model):
+        self.model = model
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+
+    async def generate_content_async(self, *args, **kwargs):
+        response = await self.model.generate_content_async(*args, **kwargs)
+        self.calls += 1
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            self.prompt_tokens += usage.prompt_token_count or 0
+            self.output_tokens += usage.candidates_token_count or 0
+        return response
+
+
+async def run_two_call(cv_text: str, page_text: str, model) -> bool:
+    job_detail = await api.extract_job_details(page_text, model)
+    if not isinstance(job_detail, tuple):
+        return False
+    await api.evaluate_cv_against_job(cv_text, job_detail[0], job_detail[1], model)
+    return True
+
+
+async def run_fused(cv_text: str, page_text: str, model) -> bool:
+    return isinstance(await api.extract_and_evaluate_job(cv_text, page_text, model), tuple)
+
+
+async def measure(name, runner, cv_text, pages, model, repeat):
+    counting = TokenCountingModel(model)
+    latencies = []
+    failures = 0
+    for _ in range(repeat):
+        for page_text in pages:
+            start = time.perf_counter()
+            if not await runner(cv_text, page_text, counting):
+                failures += 1
+            latencies.append(time.perf_counter() - start)
+    jobs = len(latencies)
+    return {
+        "mode": name,
+        "jobs": jobs,
+        "failures": failures,
+        "llm_calls_per_job": counting.calls / jobs,
+        "latency_mean_s": statistics.mean(latencies),
+        "latency_p50_s": statistics.median(latencies),
+        "prompt_tokens_per_job": counting.prompt_tokens / jobs,
+        "output_tokens_per_job": counting.output_tokens / jobs,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cv", required=True, help="Path to a .docx CV")
+    parser.add_argument("--urls", required=True, help="JSON file with a list of job URLs")
+    parser.add_argument("--repeat", type=int, default=1, help="Times to run each page through each mode")
+    parser.add_argument("--api-key", default=os.getenv("GEMINI_API_KEY"), help="Defaults to $GEMINI_API_KEY")
+    args = parser.parse_args()
+    if not args.api_key:
+        parser.error("Pass --api-key or set GEMINI_API_KEY")
+
+    with open(args.cv, "rb") as cv_file:
+        cv_text = api.read_cv_from_file(SimpleNamespace(file=cv_file))
+    with open(args.urls) as urls_file:
+        urls = json.load(urls_file)
+
+    pages = []
+    for url in urls:
+        text = await api.scrape_all_text(url)
+        if text:
+            pages.append(text)
+        else:
+            print(f"Skipping {url}: scrape failed", file=sys.stderr)
+    if not pages:
+        sys.exit("No pages could be scraped")
+
+    model = gemini_pool.get(args.api_key)
+    results = [
+        await measure("two-call", run_two_call, cv_text, pages, model, args.repeat),
+        await measure("fused", run_fused, cv_text, pages, model, args.repeat),
+    ]
+
+    columns = list(results[0].keys())
+    print("  ".join(f"{column:>22}" for column in columns))
+    for row in results:
+        print("  ".join(f"{row[column]:>22.3f}" if isinstance(row[column], float) else f"{row[column]:>22}" for column in columns))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,93 @@
+"""
+Compares the HTML parser backends (see html_parsing.py) on saved job pages.
+
+Usage (from the repository root):
+    python benchmarks/html_parsers.py
+    python benchmarks/html_parsers.py --pages saved/*.html --repeat 50 --parsers lxml selectolax
+
+For every page and backend it reports the median time to parse, to parse and get
+the page text (what /evaluate does with MAIN_CONTENT_EXTRACTION=0), and to parse
+and extract the main content (the default). Text equivalence is measured against
+"html.parser", the previous behaviour: "same" means identical text once whitespace
+is collapsed, otherwise the word-level similarity ratio is shown. The pages in
+benchmarks/fixtures are modelled on JobsDB and LinkedIn markup; nothing is fetched.
+"""
+import argparse
+import difflib
+import glob
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from html_parsing import PARSERS, available_parsers, parse_html  # noqa: E402
+from main_content import extract_main_content  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "*.html")
+BASELINE = "html.parser"
+
+
+def median_ms(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def equivalence(text: str, baseline: str) -> str:
+    words, baseline_words = text.split(), baseline.split()
+    if words == baseline_words:
+        return "same"
+    return f"{difflib.SequenceMatcher(None, words, baseline_words, autojunk=False).ratio():.3f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", nargs="+", default=[FIXTURES], help="HTML files or glob patterns")
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per page and backend")
+    parser.add_argument("--parsers", nargs="+", default=list(PARSERS), choices=PARSERS)
+    args = parser.parse_args()
+
+    paths = sorted({path for pattern in args.pages for path in glob.glob(pattern)})
+    if not paths:
+        parser.error("no pages found")
+    installed = available_parsers()
+    backends = [name for name in args.parsers if name in installed]
+    for name in set(args.parsers) - set(backends):
+        print(f"Skipping {name}: not installed")
+
+    header = f"{'page':<24} {'backend':<12} {'parse ms':>9} {'text ms':>9} {'main ms':>9} {'text eq':>8} {'main eq':>8} {'tokens kept':>12}"
+    print(header)
+    print("-" * len(header))
+    totals = {name: [0.0, 0.0, 0.0] for name in backends}
+    for path in paths:
+        with open(path, "rb") as f:
+            html = f.read().decode("utf-8", errors="replace")
+        baseline_text = parse_html(html, BASELINE).text()
+        baseline_main = extract_main_content(parse_html(html, BASELINE)).text
+        for name in backends:
+            parse_ms = median_ms(lambda: parse_html(html, name), args.repeat)
+            text_ms = median_ms(lambda: parse_html(html, name).text(), args.repeat)
+            main_ms = median_ms(lambda: extract_main_content(parse_html(html, name)), args.repeat)
+            main = extract_main_content(parse_html(html, name))
+            for i, value in enumerate((parse_ms, text_ms, main_ms)):
+                totals[name][i] += value
+            print(
+                f"{os.path.basename(path)[:24]:<24} {name:<12} {parse_ms:>9.2f} {text_ms:>9.2f} {main_ms:>9.2f} "
+                f"{equivalence(parse_html(html, name).text(), baseline_text):>8} {equivalence(main.text, baseline_main):>8} "
+                f"{f'{main.kept_tokens}/{main.page_tokens}':>12}"
+            )
+
+    print()
+    print(f"Totals over {len(paths)} pages (median ms per page, summed):")
+    for name, (parse_ms, text_ms, main_ms) in totals.items():
+        speedup = totals[BASELINE][2] / main_ms if BASELINE in totals and main_ms else float("nan")
+        print(f"  {name:<12} parse {parse_ms:8.2f}  text {text_ms:8.2f}  main {main_ms:8.2f}  ({speedup:.1f}x vs {BASELINE} on main)")
+
+
+if __name__ == "__main__":
+    main()
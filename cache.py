@@ -0,0 +1,240 @@
+"""
+Content-addressed caches with an in-memory LRU tier in front of a SQLite tier.
+
+Keys are SHA-256 digests of everything that determines a value (see `cache_key`),
+so a changed input, model or prompt version simply misses. Values must be
+JSON-serialisable. Each named cache is its own table in the shared cache database.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(*parts: Any) -> str:
+    """Stable digest of `parts`, which must be JSON-serialisable."""
+    payload = json.dumps(parts, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def extraction_cache_key(text: str, platform: str, model: str, prompt_version: str) -> str:
+    """
+    Key for a job extraction. Whitespace is collapsed first, so two scrapes of the
+    same posting that differ only in layout share one entry.
+    """
+    return cache_key("extraction", prompt_version, platform.lower(), model, " ".join(text.split()))
+
+
+class TieredCache:
+    """
+    `memory_size` entries are kept in an LRU dict; everything is also written to
+    SQLite, which is trimmed to `max_entries` rows and `max_bytes` of values by
+    evicting the least recently used rows. Entries older than `ttl` seconds are
+    treated as misses (None disables expiry).
+    """
+    def __init__(self, name: str, path: str, memory_size: int, max_entries: int, max_bytes: int, ttl: Optional[float]):
+        self.name = name
+        self.memory_size = memory_size
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._memory: "OrderedDict[str, Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            f"""CREATE TABLE IF NOT EXISTS "{name}" (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(f'CREATE INDEX IF NOT EXISTS "{name}_last_access" ON "{name}" (last_access)')
+        self._conn.commit()
+        # Running totals used for size-based eviction; approximate if several processes share the file
+        self._disk_entries, self._disk_bytes = self._conn.execute(
+            f'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM "{name}"'
+        ).fetchone()
+
+    def _remember(self, key: str, value: Any, expires_at: Optional[float]) -> None:
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+
+            row = self._conn.execute(
+                f'SELECT value, expires_at FROM "{self.name}" WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None or (row[1] is not None and row[1] <= now):
+                if row is not None:
+                    self._delete_row(key)
+                    self._conn.commit()
+                self._counters["misses"] += 1
+                return None
+
+            self._conn.execute(f'UPDATE "{self.name}" SET last_access = ? WHERE key = ?', (now, key))
+            self._conn.commit()
+            value = json.loads(row[0])
+            self._remember(key, value, row[1])
+            self._counters["disk_hits"] += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Stores `value`; `ttl` overrides the cache's default expiry for this entry."""
+        now = time.time()
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = now + ttl if ttl is not None else None
+        payload = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._remember(key, value, expires_at)
+            previous = self._conn.execute(f'SELECT size FROM "{self.name}" WHERE key = ?', (key,)).fetchone()
+            self._conn.execute(
+                f'INSERT OR REPLACE INTO "{self.name}" (key, value, size, expires_at, last_access) VALUES (?, ?, ?, ?, ?)',
+                (key, payload, len(payload), expires_at, now),
+            )
+            if previous is None:
+                self._disk_entries += 1
+            else:
+                self._disk_bytes -= previous[0]
+            self._disk_bytes += len(payload)
+            self._counters["writes"] += 1
+            self._trim()
+            self._conn.commit()
+
+    def _trim(self) -> None:
+        """Evicts least recently used rows until both disk limits are met."""
+        evicted = 0
+        while self._disk_entries > self.max_entries or self._disk_bytes > self.max_bytes:
+            batch = max(1, min(self._disk_entries - self.max_entries, 500)) if self._disk_entries > self.max_entries else 50
+            rows = self._conn.execute(
+                f'SELECT key, size FROM "{self.name}" ORDER BY last_access LIMIT ?', (batch,)
+            ).fetchall()
+            if not rows:
+                self._disk_entries, self._disk_bytes = 0, 0
+                break
+            for key, size in rows:
+                self._conn.execute(f'DELETE FROM "{self.name}" WHERE key = ?', (key,))
+                self._memory.pop(key, None)
+                self._disk_entries -= 1
+                self._disk_bytes -= size
+                evicted += 1
+                if self._disk_entries <= self.max_entries and self._disk_bytes <= self.max_bytes:
+                    break
+        if evicted:
+            self._counters["evictions"] += evicted
+            logger.info(f"Cache {self.name}: evicted {evicted} least recently used entries")
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._memory.pop(key, None)
+            self._delete_row(key)
+            self._conn.commit()
+
+    def _delete_row(self, key: str) -> None:
+        row = self._conn.execute(f'SELECT size FROM "{self.name}" WHERE key = ?', (key,)).fetchone()
+        if row is not None:
+            self._conn.execute(f'DELETE FROM "{self.name}" WHERE key = ?', (key,))
+            self._disk_entries -= 1
+            self._disk_bytes -= row[0]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            entries, total_bytes = self._disk_entries, self._disk_bytes
+            memory_entries = len(self._memory)
+        lookups = counters["memory_hits"] + counters["disk_hits"] + counters["misses"]
+        hits = counters["memory_hits"] + counters["disk_hits"]
+        return {
+            "name": self.name,
+            **counters,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            "memory_entries": memory_entries,
+            "disk_entries": entries,
+            "disk_bytes": total_bytes,
+        }
+
+
+_caches: Dict[str, TieredCache] = {}
+_caches_lock = threading.Lock()
+
+
+def _named_cache(name: str, **settings: Any) -> TieredCache:
+    with _caches_lock:
+        cache = _caches.get(name)
+        if cache is None:
+            cache = _caches[name] = TieredCache(name, config.CACHE_DB_PATH, **settings)
+        return cache
+
+
+def evaluation_cache() -> Optional[TieredCache]:
+    """CV-vs-job evaluation results, or None when caching is disabled."""
+    if not config.CACHE_ENABLED:
+        return None
+    return _named_cache(
+        "evaluations",
+        memory_size=config.RESULT_CACHE_MEMORY_SIZE,
+        max_entries=config.RESULT_CACHE_MAX_ENTRIES,
+        max_bytes=config.RESULT_CACHE_MAX_BYTES,
+        ttl=config.RESULT_CACHE_TTL,
+    )
+
+
+def extraction_cache() -> Optional[TieredCache]:
+    """Job titles and summaries extracted from page text, or None when caching is disabled."""
+    if not config.CACHE_ENABLED:
+        return None
+    return _named_cache(
+        "extractions",
+        memory_size=config.EXTRACTION_CACHE_MEMORY_SIZE,
+        max_entries=config.EXTRACTION_CACHE_MAX_ENTRIES,
+        max_bytes=config.EXTRACTION_CACHE_MAX_BYTES,
+        ttl=config.EXTRACTION_CACHE_TTL,
+    )
+
+
+def page_cache_store() -> Optional[TieredCache]:
+    """Raw scraped pages with their validators (see page_cache.py), or None when caching is disabled."""
+    if not config.CACHE_ENABLED:
+        return None
+    return _named_cache(
+        "pages",
+        memory_size=config.PAGE_CACHE_MEMORY_SIZE,
+        max_entries=config.PAGE_CACHE_MAX_ENTRIES,
+        max_bytes=config.PAGE_CACHE_MAX_BYTES,
+        ttl=config.PAGE_CACHE_TTL + config.PAGE_CACHE_STALE_TTL,
+    )
+
+
+def all_cache_stats() -> List[Dict[str, Any]]:
+    with _caches_lock:
+        caches = list(_caches.values())
+    return [cache.stats() for cache in caches]
@@ -0,0 +1,189 @@
+"""
+Runtime settings for the CV-Job Matching Service.
+
+Every value can be overridden with an environment variable of the same name.
+"""
+import os
+from typing import Dict, Tuple
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"Environment variable {name} must be an integer, got {value!r}")
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"Environment variable {name} must be a number, got {value!r}")
+
+
+def _env_str(name: str, default: str) -> str:
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return value
+
+
+def _env_domain_ttls(name: str) -> Dict[str, float]:
+    """Parses "domain=seconds" pairs separated by commas, e.g. "linkedin.com=600,hk.jobsdb.com=1800"."""
+    value = os.getenv(name, "").strip()
+    ttls = {}
+    if not value:
+        return ttls
+    for pair in value.split(","):
+        try:
+            domain, seconds = pair.split("=", 1)
+            ttls[domain.strip().lower()] = float(seconds)
+        except ValueError:
+            raise ValueError(f"Environment variable {name} has an invalid entry {pair!r}; expected domain=seconds")
+    return ttls
+
+
+def _env_domain_limits(name: str) -> Dict[str, Tuple[float, int]]:
+    """
+    Parses "domain=rate:burst" pairs separated by commas,
+    e.g. "hk.jobsdb.com=0.5:2,linkedin.com=0.25:1".
+    """
+    value = os.getenv(name, "").strip()
+    limits = {}
+    if not value:
+        return limits
+    for pair in value.split(","):
+        try:
+            domain, limit = pair.split("=", 1)
+            rate, burst = limit.split(":", 1)
+            limits[domain.strip().lower()] = (float(rate), int(burst))
+        except ValueError:
+            raise ValueError(f"Environment variable {name} has an invalid entry {pair!r}; expected domain=rate:burst")
+    return limits
+
+
+# --- Evaluation fan-out ---
+# Number of jobs evaluated at the same time when a request does not ask for a specific value.
+MAX_CONCURRENCY = _env_int("MAX_CONCURRENCY", 4)
+# Upper bound on the per-request `max_concurrency` form field.
+MAX_CONCURRENCY_LIMIT = _env_int("MAX_CONCURRENCY_LIMIT", 16)
+
+# --- Scrape -> extract -> evaluate pipeline ---
+# Capacity of the queue in front of each stage. 0 means twice that stage's worker count.
+PIPELINE_QUEUE_SIZE = _env_int("PIPELINE_QUEUE_SIZE", 0)
+
+# --- Background evaluations (submit / poll API) ---
+# Directory for the service's local SQLite files.
+DATA_DIR = _env_str("DATA_DIR", "data")
+EVALUATION_DB_PATH = _env_str("EVALUATION_DB_PATH", os.path.join(DATA_DIR, "evaluations.sqlite3"))
+# Number of submitted evaluations processed at the same time.
+EVALUATION_WORKERS = _env_int("EVALUATION_WORKERS", 2)
+
+# --- Uploaded CVs (POST /cvs) ---
+CV_DB_PATH = _env_str("CV_DB_PATH", os.path.join(DATA_DIR, "cvs.sqlite3"))
+# Registered CVs unused for this many seconds are deleted at startup.
+CV_RETENTION = _env_float("CV_RETENTION", 30 * 24 * 3600.0)
+
+# --- Per-domain scrape politeness ---
+# Requests per second allowed to any one host, and how many may go out back to back.
+SCRAPE_RATE_PER_SECOND = _env_float("SCRAPE_RATE_PER_SECOND", 0.5)
+SCRAPE_BURST = _env_int("SCRAPE_BURST", 1)
+# Per-domain overrides; a domain also covers its subdomains and they share one budget.
+SCRAPE_DOMAIN_LIMITS = _env_domain_limits("SCRAPE_DOMAIN_LIMITS")
+
+# --- Shared HTTP client ---
+HTTP_MAX_CONNECTIONS = _env_int("HTTP_MAX_CONNECTIONS", 100)
+HTTP_MAX_KEEPALIVE_CONNECTIONS = _env_int("HTTP_MAX_KEEPALIVE_CONNECTIONS", 20)
+HTTP_KEEPALIVE_EXPIRY = _env_float("HTTP_KEEPALIVE_EXPIRY", 30.0)
+# Set to 0 to force HTTP/1.1 even when the h2 package is installed.
+HTTP2_ENABLED = _env_int("HTTP2_ENABLED", 1) == 1
+
+# --- Gemini ---
+GEMINI_MODEL_NAME = _env_str("GEMINI_MODEL_NAME", "gemini-2.0-flash")
+# Ready-to-use models are cached per API key; least recently used keys are evicted first.
+GEMINI_POOL_MAX_SIZE = _env_int("GEMINI_POOL_MAX_SIZE", 64)
+# Seconds a key's model may sit unused before it is dropped from the pool.
+GEMINI_POOL_IDLE_TTL = _env_float("GEMINI_POOL_IDLE_TTL", 900.0)
+
+# --- Generation profiles (see generation_profiles.py) ---
+# Output token caps per LLM stage. A title and summary fit well within the extraction cap...
+EXTRACTION_MAX_OUTPUT_TOKENS = _env_int("EXTRACTION_MAX_OUTPUT_TOKENS", 768)
+# ...one job's scores and explanations within the scoring cap (batched calls get it once per job)...
+SCORING_MAX_OUTPUT_TOKENS = _env_int("SCORING_MAX_OUTPUT_TOKENS", 1024)
+# ...and one reasoning step or final answer of the job search agent within the agent cap.
+AGENT_MAX_OUTPUT_TOKENS = _env_int("AGENT_MAX_OUTPUT_TOKENS", 2048)
+# The model's own output limit; no call asks for more than this.
+GEMINI_MAX_OUTPUT_TOKENS = _env_int("GEMINI_MAX_OUTPUT_TOKENS", 8192)
+
+# --- Batched evaluation ---
+# Jobs scored per LLM call when a request does not set `batch_size`; 1 scores each job separately.
+EVALUATION_BATCH_SIZE = _env_int("EVALUATION_BATCH_SIZE", 1)
+# Upper bound on `batch_size`. A batch gets SCORING_MAX_OUTPUT_TOKENS per job, so by default the limit is as many
+# jobs as fit in GEMINI_MAX_OUTPUT_TOKENS; larger values are clamped to that, or the JSON array would be cut short.
+EVALUATION_BATCH_SIZE_LIMIT = _env_int("EVALUATION_BATCH_SIZE_LIMIT", max(1, GEMINI_MAX_OUTPUT_TOKENS // SCORING_MAX_OUTPUT_TOKENS))
+# Seconds an evaluation worker waits for more extracted jobs before scoring a partial batch.
+EVALUATION_BATCH_LINGER = _env_float("EVALUATION_BATCH_LINGER", 1.0)
+
+# --- Page downloads ---
+# Pages are streamed and the download stops after this many bytes...
+PAGE_MAX_BYTES = _env_int("PAGE_MAX_BYTES", 2 * 1024 * 1024)
+# ...or once this many characters of visible text have arrived (extraction only uses the first ~18k).
+PAGE_TEXT_BUDGET = _env_int("PAGE_TEXT_BUDGET", 60000)
+
+# --- Page text ---
+# HTML parser backend for every scraping path: "html.parser", "lxml" or "selectolax" (see html_parsing.py and
+# benchmarks/html_parsers.py). All three produce the same page text; selectolax is by far the fastest.
+HTML_PARSER = _env_str("HTML_PARSER", "selectolax")
+# Set to 0 to send the whole page text to the extraction prompt instead of only its main content block.
+MAIN_CONTENT_EXTRACTION = _env_int("MAIN_CONTENT_EXTRACTION", 1) == 1
+
+# --- Structured evaluation output ---
+# How many times a malformed evaluation is sent back to the model for repair before it is reported as an error.
+EVALUATION_REPAIR_ATTEMPTS = _env_int("EVALUATION_REPAIR_ATTEMPTS", 1)
+
+# --- Metrics (see metrics.py) ---
+# Domains that get their own label in the scrape metrics (subdomains included); every other host counts as "other",
+# so URLs submitted by clients cannot add label values without bound. Domains in SCRAPE_DOMAIN_LIMITS and
+# PAGE_CACHE_DOMAIN_TTLS are always included.
+METRICS_SCRAPE_DOMAINS = tuple(
+    domain.strip().lower() for domain in _env_str("METRICS_SCRAPE_DOMAINS", "linkedin.com,jobsdb.com").split(",") if domain.strip()
+)
+
+# --- Tracing (see tracing.py) ---
+# "jsonl" appends every finished span to TRACE_PATH; "none" turns tracing off.
+TRACE_EXPORTER = _env_str("TRACE_EXPORTER", "jsonl")
+TRACE_PATH = _env_str("TRACE_PATH", os.path.join(DATA_DIR, "traces.jsonl"))
+# The trace file is moved to TRACE_PATH + ".1" (replacing the previous one) once it reaches this size.
+TRACE_FILE_MAX_BYTES = _env_int("TRACE_FILE_MAX_BYTES", 64 * 1024 * 1024)
+
+# --- Caches ---
+# Set to 0 to bypass every cache (useful when benchmarking cold paths).
+CACHE_ENABLED = _env_int("CACHE_ENABLED", 1) == 1
+CACHE_DB_PATH = _env_str("CACHE_DB_PATH", os.path.join(DATA_DIR, "cache.sqlite3"))
+# Evaluation results, keyed on CV text, job, model and prompt version.
+RESULT_CACHE_TTL = _env_float("RESULT_CACHE_TTL", 7 * 24 * 3600.0)
+RESULT_CACHE_MEMORY_SIZE = _env_int("RESULT_CACHE_MEMORY_SIZE", 1024)
+RESULT_CACHE_MAX_ENTRIES = _env_int("RESULT_CACHE_MAX_ENTRIES", 50000)
+RESULT_CACHE_MAX_BYTES = _env_int("RESULT_CACHE_MAX_BYTES", 256 * 1024 * 1024)
+# Extracted job titles and summaries, keyed on the cleaned page text, platform, model and prompt version.
+EXTRACTION_CACHE_TTL = _env_float("EXTRACTION_CACHE_TTL", 14 * 24 * 3600.0)
+EXTRACTION_CACHE_MEMORY_SIZE = _env_int("EXTRACTION_CACHE_MEMORY_SIZE", 512)
+EXTRACTION_CACHE_MAX_ENTRIES = _env_int("EXTRACTION_CACHE_MAX_ENTRIES", 20000)
+EXTRACTION_CACHE_MAX_BYTES = _env_int("EXTRACTION_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+# Scraped pages, keyed by normalised URL. A page is fresh for its domain's TTL, then served
+# stale for up to PAGE_CACHE_STALE_TTL more seconds while it is revalidated in the background.
+PAGE_CACHE_TTL = _env_float("PAGE_CACHE_TTL", 3600.0)
+PAGE_CACHE_DOMAIN_TTLS = _env_domain_ttls("PAGE_CACHE_DOMAIN_TTLS")
+PAGE_CACHE_STALE_TTL = _env_float("PAGE_CACHE_STALE_TTL", 24 * 3600.0)
+# Past the stale window an entry is kept this many more seconds for its ETag / Last-Modified,
+# so the next fetch is a conditional GET (a 304 costs a round trip, not a download).
+PAGE_CACHE_REVALIDATE_TTL = _env_float("PAGE_CACHE_REVALIDATE_TTL", 7 * 24 * 3600.0)
+PAGE_CACHE_MEMORY_SIZE = _env_int("PAGE_CACHE_MEMORY_SIZE", 128)
+PAGE_CACHE_MAX_ENTRIES = _env_int("PAGE_CACHE_MAX_ENTRIES", 5000)
+PAGE_CACHE_MAX_BYTES = _env_int("PAGE_CACHE_MAX_BYTES", 512 * 1024 * 1024)
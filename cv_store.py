@@ -0,0 +1,98 @@
+"""
+SQLite-backed registry of uploaded CVs.
+
+A CV is uploaded once (POST /cvs) and its parsed text stored under the SHA-256
+of the file's bytes, which becomes its `cv_id`. Evaluation requests can then pass
+`cv_id` instead of re-uploading the .docx, skipping both the multipart upload and
+the parse. Uploading the same file again returns the same ID. CVs that have not
+been used for CV_RETENTION seconds are deleted on startup.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+def cv_id_for(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+class CVStore:
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cvs (
+                id TEXT PRIMARY KEY,
+                filename TEXT,
+                text TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def add(self, cv_id: str, filename: Optional[str], text: str) -> bool:
+        """Stores a parsed CV; returns False if it was already registered."""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO cvs (id, filename, text, created_at, last_used_at) VALUES (?, ?, ?, ?, ?)",
+                (cv_id, filename, text, now, now),
+            )
+            if cursor.rowcount == 0:
+                self._conn.execute("UPDATE cvs SET last_used_at = ? WHERE id = ?", (now, cv_id))
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def get_text(self, cv_id: str) -> Optional[str]:
+        """Returns the CV's parsed text and marks it as used, or None if the ID is unknown."""
+        with self._lock:
+            row = self._conn.execute("SELECT text FROM cvs WHERE id = ?", (cv_id,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE cvs SET last_used_at = ? WHERE id = ?", (time.time(), cv_id))
+            self._conn.commit()
+        return row[0]
+
+    def get(self, cv_id: str) -> Optional[Dict[str, Any]]:
+        """Metadata for a registered CV (not its text), or None if the ID is unknown."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT filename, LENGTH(text), created_at, last_used_at FROM cvs WHERE id = ?", (cv_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        filename, characters, created_at, last_used_at = row
+        return {
+            "cv_id": cv_id,
+            "filename": filename,
+            "characters": characters,
+            "created_at": created_at,
+            "last_used_at": last_used_at,
+        }
+
+    def delete(self, cv_id: str) -> bool:
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM cvs WHERE id = ?", (cv_id,))
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def delete_unused(self, max_age: float) -> int:
+        """Deletes CVs not used for `max_age` seconds and returns how many were removed."""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM cvs WHERE last_used_at < ?", (time.time() - max_age,))
+            self._conn.commit()
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
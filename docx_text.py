@@ -0,0 +1,115 @@
+"""
+Streaming text extraction from .docx files.
+
+A .docx is a zip archive whose body lives in word/document.xml. Rather than
+building python-docx's full object tree (which also ignores tables, where many
+CVs keep their skills), the XML is streamed with iterparse and each paragraph is
+emitted as soon as it closes. Table rows become one line each, cells separated
+by " | ". A text box (common in CV templates) sits inside a paragraph and becomes
+its own line ahead of it; Word also stores a legacy copy of it in mc:Fallback,
+which is skipped so it is read once. Elements are cleared once emitted, so
+memory stays flat however long the document is. Both the API and the agent read
+CVs through this module, so they see the same text.
+"""
+import zipfile
+from typing import BinaryIO, Iterator, List, Union
+from xml.etree.ElementTree import iterparse
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_BODY = W + "body"
+_PARAGRAPH = W + "p"
+_TABLE = W + "tbl"
+_ROW = W + "tr"
+_CELL = W + "tc"
+_TEXT = W + "t"
+_TAB = W + "tab"
+_BREAKS = {W + "br", W + "cr"}
+_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+CELL_SEPARATOR = " | "
+
+
+def iter_docx_lines(source: Union[str, BinaryIO]) -> Iterator[str]:
+    """
+    Yields the document's lines in order: one per paragraph outside tables and one
+    per table row. `source` is a path or a seekable binary file object.
+    Raises zipfile.BadZipFile or KeyError if it is not a Word document.
+    """
+    with zipfile.ZipFile(source) as archive, archive.open("word/document.xml") as xml:
+        # Text runs of each open paragraph (text boxes nest paragraphs), cells of the current row (one list per nested table)
+        paragraphs: List[List[str]] = []
+        rows: List[List[str]] = []
+        cell_paragraphs: List[List[str]] = []
+        body = None
+        table_depth = 0
+        fallback_depth = 0
+        for event, element in iterparse(xml, events=("start", "end")):
+            tag = element.tag
+            if event == "start":
+                if tag == _FALLBACK:
+                    fallback_depth += 1
+                if fallback_depth:
+                    continue
+                if tag == _BODY:
+                    body = element
+                elif tag == _PARAGRAPH:
+                    paragraphs.append([])
+                elif tag == _TABLE:
+                    table_depth += 1
+                elif tag == _ROW:
+                    rows.append([])
+                elif tag == _CELL:
+                    cell_paragraphs.append([])
+                continue
+
+            if fallback_depth:
+                if tag == _FALLBACK:
+                    fallback_depth -= 1
+                    element.clear()
+                continue
+
+            if tag == _TEXT:
+                if paragraphs:
+                    paragraphs[-1].append(element.text or "")
+            elif tag == _TAB:
+                if paragraphs:
+                    paragraphs[-1].append("\t")
+            elif tag in _BREAKS:
+                if paragraphs:
+                    paragraphs[-1].append("\n")
+            elif tag == _PARAGRAPH:
+                text = "".join(paragraphs.pop())
+                if cell_paragraphs:
+                    if text.strip():
+                        cell_paragraphs[-1].append(text.strip())
+                else:
+                    yield text
+                element.clear()
+                if not table_depth and not paragraphs and body is not None:
+                    body.clear()  # Drop finished siblings so the tree never grows
+            elif tag == _CELL:
+                text = " ".join(cell_paragraphs.pop())
+                if rows:
+                    rows[-1].append(text)
+                elif cell_paragraphs:
+                    cell_paragraphs[-1].append(text)
+                element.clear()
+            elif tag == _ROW:
+                cells = [cell for cell in rows.pop() if cell]
+                line = CELL_SEPARATOR.join(cells)
+                if cell_paragraphs:
+                    # A nested table's rows belong to the enclosing cell
+                    if line:
+                        cell_paragraphs[-1].append(line)
+                elif line:
+                    yield line
+                element.clear()
+            elif tag == _TABLE:
+                table_depth -= 1
+                element.clear()
+                if not table_depth and body is not None:
+                    body.clear()
+
+
+def extract_docx_text(source: Union[str, BinaryIO]) -> str:
+    """The document's text, one line per paragraph or table row."""
+    return "\n".join(iter_docx_lines(source))
@@ -0,0 +1,127 @@
+"""
+SQLite-backed status and results for background evaluations.
+
+Every finished job is written as soon as it completes, so a restart only loses
+the jobs that were still in flight. The API key is never persisted, which means
+evaluations that were queued or running when the process stopped cannot be
+resumed; they are marked "interrupted" on startup and keep their partial results.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+INTERRUPTED = "interrupted"
+
+
+class EvaluationStore:
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS evaluations (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                total INTEGER NOT NULL,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS evaluation_results (
+                evaluation_id TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                result TEXT NOT NULL,
+                PRIMARY KEY (evaluation_id, idx)
+            );
+            """
+        )
+        self._conn.commit()
+
+    def create(self, total: int) -> str:
+        """Registers a new queued evaluation of `total` jobs and returns its ID."""
+        evaluation_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO evaluations (id, status, total, error, created_at, updated_at) VALUES (?, ?, ?, NULL, ?, ?)",
+                (evaluation_id, QUEUED, total, now, now),
+            )
+            self._conn.commit()
+        return evaluation_id
+
+    def set_status(self, evaluation_id: str, status: str, error: Optional[str] = None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE evaluations SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                (status, error, time.time(), evaluation_id),
+            )
+            self._conn.commit()
+
+    def add_result(self, evaluation_id: str, index: int, result: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO evaluation_results (evaluation_id, idx, result) VALUES (?, ?, ?)",
+                (evaluation_id, index, json.dumps(result)),
+            )
+            self._conn.execute(
+                "UPDATE evaluations SET updated_at = ? WHERE id = ?",
+                (time.time(), evaluation_id),
+            )
+            self._conn.commit()
+
+    def get(self, evaluation_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the evaluation's status together with the results finished so far,
+        ordered by job index, or None if the ID is unknown.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, total, error, created_at, updated_at FROM evaluations WHERE id = ?",
+                (evaluation_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            result_rows = self._conn.execute(
+                "SELECT idx, result FROM evaluation_results WHERE evaluation_id = ? ORDER BY idx",
+                (evaluation_id,),
+            ).fetchall()
+        status, total, error, created_at, updated_at = row
+        return {
+            "evaluation_id": evaluation_id,
+            "status": status,
+            "total": total,
+            "completed": len(result_rows),
+            "error": error,
+            "created_at": created_at,
+            "updated_at": updated_at,
+            "results": [{"index": idx, "evaluation": json.loads(result)} for idx, result in result_rows],
+        }
+
+    def mark_interrupted(self) -> int:
+        """
+        Marks every queued or running evaluation as interrupted. Called once at
+        startup, which assumes a single service process owns the database.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE evaluations SET status = ?, error = ?, updated_at = ? WHERE status IN (?, ?)",
+                (INTERRUPTED, "The service restarted before this evaluation finished", time.time(), QUEUED, RUNNING),
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,82 @@
+"""
+Per-API-key pool of ready Gemini models.
+
+`genai.configure` changes process-global state, so two concurrent requests with
+different keys could end up calling Gemini with each other's key. Instead, every
+pooled model gets its own generative-service clients built from that key alone,
+and nothing global is touched.
+"""
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Tuple
+
+import google.generativeai as genai
+from google.ai import generativelanguage as glm
+from google.api_core import client_options as client_options_lib
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+def _key_id(api_key: str) -> str:
+    """Non-reversible identifier of an API key, used as the pool key."""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+
+class GeminiModelPool:
+    def __init__(self, model_name: str, max_size: int, idle_ttl: float):
+        self.model_name = model_name
+        self.max_size = max(1, max_size)
+        self.idle_ttl = idle_ttl
+        self._models: "OrderedDict[str, Tuple[genai.GenerativeModel, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _create(self, api_key: str) -> genai.GenerativeModel:
+        options = client_options_lib.ClientOptions(api_key=api_key)
+        model = genai.GenerativeModel(self.model_name)
+        # GenerativeModel falls back to the global default clients only when these are unset
+        model._client = glm.GenerativeServiceClient(client_options=options)
+        model._async_client = glm.GenerativeServiceAsyncClient(client_options=options)
+        return model
+
+    def _evict_idle(self, now: float) -> None:
+        expired = [key for key, (_, last_used) in self._models.items() if now - last_used > self.idle_ttl]
+        for key in expired:
+            del self._models[key]
+        if expired:
+            logger.info(f"Dropped {len(expired)} idle Gemini models from the pool")
+
+    def get(self, api_key: str) -> genai.GenerativeModel:
+        """Returns the pooled model for `api_key`, creating it on first use."""
+        key = _key_id(api_key)
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._models.get(key)
+            if entry is not None:
+                self._models[key] = (entry[0], now)
+                self._models.move_to_end(key)
+                return entry[0]
+
+        model = self._create(api_key)
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is not None:  # Another request created it meanwhile
+                model = entry[0]
+            self._models[key] = (model, now)
+            self._models.move_to_end(key)
+            while len(self._models) > self.max_size:
+                self._models.popitem(last=False)
+        logger.info(f"Created Gemini model for key {key[:12]}")
+        return model
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._models)
+
+
+gemini_pool = GeminiModelPool(config.GEMINI_MODEL_NAME, config.GEMINI_POOL_MAX_SIZE, config.GEMINI_POOL_IDLE_TTL)
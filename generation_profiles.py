@@ -0,0 +1,98 @@
+"""
+Named generation settings for each LLM stage.
+
+Every Gemini call used to run on the model's default sampling with no output
+limit, so a rambling answer could take several times longer than a normal one.
+Each stage now has a profile with its temperature, an output token cap and
+optional stop sequences:
+
+- "extraction": job title and summary as plain "Title:/Detail:" text
+- "scoring":    the JSON evaluation, scores plus their brief explanations
+- "agent":      reasoning steps and tool calls of the job search agent
+
+No stage uses stop sequences at the moment: in JSON mode a stop string inside an
+explanation would cut the object short, and in the plain-text extraction output
+any candidate (such as a "---" rule) can legitimately appear in the Detail.
+
+After every call the realized output tokens are logged per stage, with a warning
+when a response hit its cap, and input and output tokens are added to the
+per-stage counters in metrics.py and to the active trace span, so the caps can
+be tuned from the logs and dashboards.
+"""
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from google.generativeai import types
+
+import config
+from metrics import count_tokens
+from tracing import current_span
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class GenerationProfile:
+    name: str
+    temperature: float
+    max_output_tokens: int
+    stop_sequences: Tuple[str, ...] = ()
+
+    def config(self, max_output_tokens: Optional[int] = None, **extra: Any) -> types.GenerationConfig:
+        """A GenerationConfig for this stage; `extra` adds e.g. a JSON response schema."""
+        return types.GenerationConfig(
+            temperature=self.temperature,
+            max_output_tokens=min(max_output_tokens or self.max_output_tokens, config.GEMINI_MAX_OUTPUT_TOKENS),
+            stop_sequences=list(self.stop_sequences) or None,
+            **extra,
+        )
+
+    def langchain_kwargs(self) -> Dict[str, Any]:
+        """Constructor arguments for LangChain's ChatGoogleGenerativeAI."""
+        return {"temperature": self.temperature, "max_output_tokens": self.max_output_tokens}
+
+
+PROFILES = {
+    "extraction": GenerationProfile("extraction", 0.0, config.EXTRACTION_MAX_OUTPUT_TOKENS),
+    "scoring": GenerationProfile("scoring", 0.0, config.SCORING_MAX_OUTPUT_TOKENS),
+    "agent": GenerationProfile("agent", 0.0, config.AGENT_MAX_OUTPUT_TOKENS),
+}
+
+
+def profile(stage: str) -> GenerationProfile:
+    return PROFILES[stage]
+
+
+def token_usage(response: Any) -> Tuple[Optional[int], Optional[int]]:
+    """(input, output) tokens of a Gemini response or LangChain message, None where not reported."""
+    usage = getattr(response, "usage_metadata", None)
+    if isinstance(usage, dict):  # LangChain messages
+        return usage.get("input_tokens"), usage.get("output_tokens")
+    return getattr(usage, "prompt_token_count", None), getattr(usage, "candidates_token_count", None)
+
+
+def _finish_reason(response: Any) -> Optional[str]:
+    metadata = getattr(response, "response_metadata", None)
+    if isinstance(metadata, dict):  # LangChain messages
+        return metadata.get("finish_reason")
+    candidates = getattr(response, "candidates", None) or []
+    reason = getattr(candidates[0], "finish_reason", None) if candidates else None
+    return getattr(reason, "name", None)
+
+
+def record_token_usage(stage: str, response: Any, max_output_tokens: Optional[int] = None) -> Optional[int]:
+    """Counts the tokens of a call to `stage`, logs its output tokens and returns them."""
+    input_tokens, tokens = token_usage(response)
+    count_tokens(stage, input_tokens, tokens)
+    active = current_span()
+    if active is not None:
+        active.set(input_tokens=input_tokens, output_tokens=tokens)
+    if tokens is None:
+        return None
+    cap = max_output_tokens or PROFILES[stage].max_output_tokens
+    if _finish_reason(response) == "MAX_TOKENS":
+        logger.warning(f"{stage} output hit its cap of {cap} tokens and was cut short")
+    else:
+        logger.info(f"{stage} output tokens: {tokens} (cap {cap})")
+    return tokens
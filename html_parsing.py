@@ -0,0 +1,190 @@
+"""
+Pluggable HTML parser backends.
+
+Parsing dominates scrape time once pages come from the page cache, and
+BeautifulSoup's pure-Python "html.parser" is the slowest option. Every scraping
+path goes through `parse_html`, which returns an `HtmlDocument` with a small
+CSS-selector based API implemented by each backend:
+
+- "html.parser": BeautifulSoup with the standard library parser (no extra dependency)
+- "lxml":        BeautifulSoup with lxml's C parser; same tree API, several times faster
+- "selectolax":  selectolax's Lexbor engine, fastest, without BeautifulSoup at all
+
+The backend is chosen with the HTML_PARSER setting; benchmarks/html_parsers.py
+compares their speed and text output on saved job pages.
+"""
+from typing import Any, Iterable, List, Optional, Union
+
+from bs4 import BeautifulSoup
+
+import config
+
+PARSERS = ("html.parser", "lxml", "selectolax")
+
+
+class HtmlDocument:
+    """A parsed page. Node objects are backend specific and only valid for this document."""
+    parser: str
+
+    @property
+    def root(self) -> Any:
+        raise NotImplementedError
+
+    def select(self, selector: str, node: Any = None) -> List[Any]:
+        raise NotImplementedError
+
+    def select_one(self, selector: str, node: Any = None) -> Optional[Any]:
+        raise NotImplementedError
+
+    def text(self, node: Any = None, separator: str = "", strip: bool = False) -> str:
+        raise NotImplementedError
+
+    def attr(self, node: Any, name: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def tag_name(self, node: Any) -> str:
+        raise NotImplementedError
+
+    def parent(self, node: Any) -> Optional[Any]:
+        """The parent element, or None at the top of the tree."""
+        raise NotImplementedError
+
+    def children(self, node: Any) -> List[Any]:
+        """Child elements only, no text nodes."""
+        raise NotImplementedError
+
+    def key(self, node: Any) -> int:
+        """Identity of the underlying node, stable across lookups."""
+        raise NotImplementedError
+
+    def _decompose(self, node: Any) -> None:
+        raise NotImplementedError
+
+    def remove(self, nodes: Iterable[Any]) -> None:
+        """
+        Deletes `nodes` and their subtrees. Nodes inside another node being removed
+        are skipped, since some backends free a subtree as soon as its root goes.
+        """
+        nodes = list(nodes)
+        doomed = {self.key(node) for node in nodes}
+        for node in nodes:
+            ancestor = self.parent(node)
+            while ancestor is not None and self.key(ancestor) not in doomed:
+                ancestor = self.parent(ancestor)
+            if ancestor is None:
+                self._decompose(node)
+
+    def title(self) -> Optional[str]:
+        node = self.select_one("title")
+        text = self.text(node, strip=True) if node is not None else ""
+        return text or None
+
+
+class SoupDocument(HtmlDocument):
+    def __init__(self, content: Union[str, bytes], parser: str):
+        self.parser = parser
+        self.soup = BeautifulSoup(content, parser)
+
+    @property
+    def root(self) -> Any:
+        return self.soup
+
+    def select(self, selector: str, node: Any = None) -> List[Any]:
+        return (node if node is not None else self.soup).select(selector)
+
+    def select_one(self, selector: str, node: Any = None) -> Optional[Any]:
+        return (node if node is not None else self.soup).select_one(selector)
+
+    def text(self, node: Any = None, separator: str = "", strip: bool = False) -> str:
+        return (node if node is not None else self.soup).get_text(separator, strip=strip)
+
+    def attr(self, node: Any, name: str) -> Optional[str]:
+        value = node.get(name)
+        # BeautifulSoup splits multi-valued attributes such as class into lists
+        return " ".join(value) if isinstance(value, list) else value
+
+    def tag_name(self, node: Any) -> str:
+        return node.name
+
+    def parent(self, node: Any) -> Optional[Any]:
+        parent = node.parent
+        return None if parent is None or parent is self.soup else parent
+
+    def children(self, node: Any) -> List[Any]:
+        return node.find_all(True, recursive=False)
+
+    def key(self, node: Any) -> int:
+        return id(node)
+
+    def _decompose(self, node: Any) -> None:
+        node.decompose()
+
+
+class LexborDocument(HtmlDocument):
+    parser = "selectolax"
+
+    def __init__(self, content: Union[str, bytes]):
+        from selectolax.lexbor import LexborHTMLParser
+        self.tree = LexborHTMLParser(content)
+        # BeautifulSoup leaves script and style contents out of get_text(); do the same
+        self.tree.strip_tags(["script", "style"])
+
+    @property
+    def root(self) -> Any:
+        return self.tree.root
+
+    def select(self, selector: str, node: Any = None) -> List[Any]:
+        return list((node if node is not None else self.tree).css(selector))
+
+    def select_one(self, selector: str, node: Any = None) -> Optional[Any]:
+        return (node if node is not None else self.tree).css_first(selector)
+
+    def text(self, node: Any = None, separator: str = "", strip: bool = False) -> str:
+        node = node if node is not None else self.tree.root
+        if node is None:
+            return ""
+        if not strip:
+            return node.text(separator=separator)
+        # Lexbor keeps whitespace-only text nodes as empty strings; drop them like BeautifulSoup does
+        return separator.join(part for part in node.text(separator="\x00", strip=True).split("\x00") if part)
+
+    def attr(self, node: Any, name: str) -> Optional[str]:
+        return node.attributes.get(name)
+
+    def tag_name(self, node: Any) -> str:
+        return node.tag
+
+    def parent(self, node: Any) -> Optional[Any]:
+        parent = node.parent
+        return None if parent is None or parent.tag == "-document" else parent
+
+    def children(self, node: Any) -> List[Any]:
+        return list(node.iter())
+
+    def key(self, node: Any) -> int:
+        return node.mem_id
+
+    def _decompose(self, node: Any) -> None:
+        node.decompose()
+
+
+def available_parsers() -> List[str]:
+    """The backends whose libraries are installed."""
+    available = ["html.parser"]
+    for name, module in (("lxml", "lxml"), ("selectolax", "selectolax.lexbor")):
+        try:
+            __import__(module)
+            available.append(name)
+        except ImportError:
+            pass
+    return available
+
+
+def parse_html(content: Union[str, bytes], parser: Optional[str] = None) -> HtmlDocument:
+    """Parses `content` with `parser`, or the configured HTML_PARSER."""
+    parser = parser or config.HTML_PARSER
+    if parser == "selectolax":
+        return LexborDocument(content)
+    if parser in ("html.parser", "lxml"):
+        return SoupDocument(content, parser)
+    raise ValueError(f"Unknown HTML parser {parser!r}; expected one of {', '.join(PARSERS)}")
@@ -0,0 +1,74 @@
+"""
+Process-wide pooled HTTP clients shared by every scraper.
+
+Reusing one client keeps connections alive between fetches, so repeated hits to
+hk.jobsdb.com or linkedin.com skip DNS, TCP and TLS setup. httpx negotiates
+gzip/deflate by itself, plus brotli when the `brotli` package is installed, and
+HTTP/2 is used with servers that support it when `h2` is installed.
+"""
+import logging
+import threading
+from typing import Optional
+
+import httpx
+
+import config
+
+logger = logging.getLogger(__name__)
+
+_async_client: Optional[httpx.AsyncClient] = None
+_sync_client: Optional[httpx.Client] = None
+_lock = threading.Lock()
+
+
+def _http2_supported() -> bool:
+    if not config.HTTP2_ENABLED:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.info("h2 is not installed; the shared HTTP client will use HTTP/1.1 only")
+        return False
+    return True
+
+
+def _client_options() -> dict:
+    return {
+        "http2": _http2_supported(),
+        "follow_redirects": True,
+        "limits": httpx.Limits(
+            max_connections=config.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY,
+        ),
+        "timeout": httpx.Timeout(25.0),
+    }
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Returns the shared async client, creating it on first use."""
+    global _async_client
+    with _lock:
+        if _async_client is None or _async_client.is_closed:
+            _async_client = httpx.AsyncClient(**_client_options())
+        return _async_client
+
+
+def get_sync_client() -> httpx.Client:
+    """Returns the shared blocking client used by the synchronous LangChain tools."""
+    global _sync_client
+    with _lock:
+        if _sync_client is None or _sync_client.is_closed:
+            _sync_client = httpx.Client(**_client_options())
+        return _sync_client
+
+
+async def aclose_clients() -> None:
+    global _async_client, _sync_client
+    with _lock:
+        async_client, _async_client = _async_client, None
+        sync_client, _sync_client = _sync_client, None
+    if async_client is not None:
+        await async_client.aclose()
+    if sync_client is not None:
+        sync_client.close()
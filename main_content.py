@@ -0,0 +1,168 @@
+"""
+Readability-style main-content extraction for job pages.
+
+Job boards wrap a few hundred words of posting in navigation, footers, cookie
+banners, related-job carousels and inline scripts. Sending all of that to the
+extraction prompt costs tokens and latency, so before the LLM call we score the
+page's blocks by text density (long, comma-rich text with few links scores high)
+and keep only the best-scoring container and its similarly scored siblings.
+Pages where nothing stands out fall back to the full page text.
+"""
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Union
+
+from html_parsing import HtmlDocument, parse_html
+
+# Never part of the posting
+NOISE_TAGS = ["script", "style", "noscript", "template", "svg", "iframe", "form", "button", "select", "nav", "footer", "aside"]
+# class/id hints, as in Mozilla's Readability
+UNLIKELY_PATTERN = re.compile(
+    r"banner|breadcrumb|cookie|consent|comment|footer|menu|modal|navbar|newsletter|popup|promo|"
+    r"recommend|related|share|sidebar|signin|signup|social|sponsor|subscribe|similar",
+    re.I,
+)
+LIKELY_PATTERN = re.compile(r"article|body|content|description|detail|job|main|posting|requirement|responsibilit", re.I)
+# Elements whose own text counts as a paragraph
+PARAGRAPH_TAGS = ["p", "li", "pre", "td", "dd", "blockquote", "h1", "h2", "h3", "h4"]
+BLOCK_TAGS = {"div", "section", "article", "main", "p", "ul", "ol", "table", "pre", "blockquote"}
+TAG_WEIGHTS = {"article": 10, "main": 10, "section": 5, "div": 5, "td": 3, "pre": 3, "blockquote": 3}
+KEEP_TAGS = {"html", "body", "main", "article"}
+
+MIN_PARAGRAPH_CHARS = 25
+# Below this many characters the chosen block is probably not the posting, so the full text is used
+MIN_MAIN_CONTENT_CHARS = 200
+
+
+@dataclass
+class MainContent:
+    text: str
+    page_tokens: int
+    kept_tokens: int
+    fallback: bool = False
+
+    @property
+    def tokens_removed(self) -> int:
+        return self.page_tokens - self.kept_tokens
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English text)."""
+    return (len(text) + 3) // 4
+
+
+def _hints(doc: HtmlDocument, node: Any) -> str:
+    return (doc.attr(node, "class") or "") + " " + (doc.attr(node, "id") or "")
+
+
+def _class_weight(doc: HtmlDocument, node: Any) -> int:
+    hints = _hints(doc, node)
+    weight = 0
+    if LIKELY_PATTERN.search(hints):
+        weight += 25
+    if UNLIKELY_PATTERN.search(hints):
+        weight -= 25
+    return weight
+
+
+def _link_density(doc: HtmlDocument, node: Any, text_length: int) -> float:
+    if not text_length:
+        return 1.0
+    link_length = sum(len(doc.text(link, strip=True)) for link in doc.select("a", node))
+    return min(1.0, link_length / text_length)
+
+
+def _is_paragraph(doc: HtmlDocument, node: Any) -> bool:
+    # A div holding only inline content is written like a paragraph on many job boards
+    if doc.tag_name(node) == "div":
+        return not any(doc.tag_name(child) in BLOCK_TAGS for child in doc.children(node))
+    return True
+
+
+def _strip_noise(doc: HtmlDocument) -> None:
+    doc.remove(doc.select(", ".join(NOISE_TAGS)))
+    doc.remove(
+        node for node in doc.select("[class], [id]")
+        if doc.tag_name(node) not in KEEP_TAGS
+        and UNLIKELY_PATTERN.search(_hints(doc, node)) and not LIKELY_PATTERN.search(_hints(doc, node))
+    )
+
+
+def _title(doc: HtmlDocument) -> Optional[str]:
+    heading = doc.select_one("h1")
+    if heading is not None and doc.text(heading, strip=True):
+        return doc.text(heading, " ", strip=True)
+    return doc.title()
+
+
+def extract_main_content(html: Union[str, bytes, HtmlDocument]) -> MainContent:
+    """
+    Returns the text of the page's main content block, with the page heading in
+    front when the block does not contain it, and token counts before and after.
+    `html` may be an already parsed document, which is modified in place.
+    """
+    doc = html if isinstance(html, HtmlDocument) else parse_html(html)
+    # Both counts use the same newline-joined, stripped text, so they compare like for like
+    page_tokens = estimate_tokens(doc.text(separator="\n", strip=True))
+    title = _title(doc)
+    _strip_noise(doc)
+
+    scores: Dict[int, float] = {}
+    nodes: Dict[int, Any] = {}
+
+    def add_score(node: Optional[Any], score: float) -> None:
+        if node is None or doc.tag_name(node) == "html":
+            return
+        key = doc.key(node)
+        if key not in scores:
+            nodes[key] = node
+            scores[key] = TAG_WEIGHTS.get(doc.tag_name(node), 0) + _class_weight(doc, node)
+        scores[key] += score
+
+    for paragraph in doc.select(", ".join(PARAGRAPH_TAGS + ["div"])):
+        if not _is_paragraph(doc, paragraph):
+            continue
+        text = doc.text(paragraph, " ", strip=True)
+        if len(text) < MIN_PARAGRAPH_CHARS:
+            continue
+        score = 1 + text.count(",") + min(len(text) // 100, 3)
+        parent = doc.parent(paragraph)
+        add_score(parent, score)
+        add_score(doc.parent(parent) if parent is not None else None, score / 2)
+
+    if not scores:
+        return _full_text(doc, page_tokens)
+
+    final_scores: Dict[int, float] = {}
+
+    def final_score(key: int) -> float:
+        if key not in final_scores:
+            node = nodes[key]
+            final_scores[key] = scores[key] * (1 - _link_density(doc, node, len(doc.text(node, strip=True))))
+        return final_scores[key]
+
+    best_key = max(scores, key=final_score)
+    best, best_score = nodes[best_key], final_score(best_key)
+
+    # Postings are sometimes split over sibling blocks (summary, requirements, benefits)
+    threshold = max(10.0, best_score * 0.2)
+    parts = []
+    parent = doc.parent(best)
+    for sibling in doc.children(parent) if parent is not None else [best]:
+        key = doc.key(sibling)
+        if key == best_key or (key in scores and final_score(key) >= threshold):
+            parts.append(doc.text(sibling, "\n", strip=True))
+    text = "\n".join(part for part in parts if part)
+
+    if len(text) < MIN_MAIN_CONTENT_CHARS:
+        return _full_text(doc, page_tokens)
+    # The prepended heading is not counted; it is page text that the block happened to leave out
+    kept_tokens = estimate_tokens(text)
+    if title and title not in text:
+        text = f"{title}\n{text}"
+    return MainContent(text=text, page_tokens=page_tokens, kept_tokens=kept_tokens)
+
+
+def _full_text(doc: HtmlDocument, page_tokens: int) -> MainContent:
+    text = doc.text(separator="\n", strip=True)
+    return MainContent(text=text, page_tokens=page_tokens, kept_tokens=estimate_tokens(text), fallback=True)
@@ -0,0 +1,102 @@
+"""
+Prometheus metrics, served by the API at GET /metrics.
+
+- cvhelper_stage_seconds{stage}: latency histogram of the pipeline stages,
+  "scrape", "html_parse", "docx_parse", "extraction_llm" and "evaluation_llm"
+- cvhelper_llm_tokens_total{stage, direction}: prompt ("input") and response
+  ("output") tokens per generation profile (see generation_profiles.py)
+- cvhelper_scrape_responses_total{domain, status}: HTTP status of every page
+  download, "error" when no response arrived; hosts outside the configured
+  domains (METRICS_SCRAPE_DOMAINS) are counted under domain "other"
+- cvhelper_http_requests_in_progress: API requests currently being served
+- cvhelper_cache_*: hits, misses and hit ratio of every cache, read from
+  cache.all_cache_stats() at scrape time so the caches need no extra hooks
+
+Everything is registered on prometheus_client's default registry, which also
+carries the standard process and Python metrics.
+"""
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+from urllib.parse import urlsplit
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+import config
+from cache import all_cache_stats
+
+STAGES = ("scrape", "html_parse", "docx_parse", "extraction_llm", "evaluation_llm")
+
+STAGE_SECONDS = Histogram(
+    "cvhelper_stage_seconds",
+    "Time spent in each pipeline stage.",
+    ["stage"],
+    # Parsing takes milliseconds, scrapes and LLM calls take seconds
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80),
+)
+LLM_TOKENS = Counter("cvhelper_llm_tokens", "LLM tokens by generation profile.", ["stage", "direction"])
+SCRAPE_RESPONSES = Counter("cvhelper_scrape_responses", "Page download results by domain.", ["domain", "status"])
+REQUESTS_IN_PROGRESS = Gauge("cvhelper_http_requests_in_progress", "API requests currently being served.")
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """Observes the time spent in the `with` block under `stage`, including on errors."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(stage).observe(time.perf_counter() - start)
+
+
+def count_tokens(stage: str, input_tokens: Optional[int], output_tokens: Optional[int]) -> None:
+    if input_tokens:
+        LLM_TOKENS.labels(stage, "input").inc(input_tokens)
+    if output_tokens:
+        LLM_TOKENS.labels(stage, "output").inc(output_tokens)
+
+
+# Longest first, so a configured subdomain wins over its parent domain
+SCRAPE_DOMAINS = sorted(
+    set(config.METRICS_SCRAPE_DOMAINS) | set(config.SCRAPE_DOMAIN_LIMITS) | set(config.PAGE_CACHE_DOMAIN_TTLS),
+    key=len, reverse=True,
+)
+
+
+def scrape_domain(url: str) -> str:
+    """The configured domain that `url` belongs to, or "other"."""
+    host = (urlsplit(url).hostname or "").lower()
+    for domain in SCRAPE_DOMAINS:
+        if host == domain or host.endswith("." + domain):
+            return domain
+    return "other"
+
+
+def count_scrape_response(url: str, status: Optional[int]) -> None:
+    """Counts a download of `url`; pass None when the request failed without a response."""
+    SCRAPE_RESPONSES.labels(scrape_domain(url), str(status) if status is not None else "error").inc()
+
+
+class _CacheCollector(Collector):
+    def collect(self):
+        hits = CounterMetricFamily("cvhelper_cache_hits", "Cache hits by tier.", labels=["cache", "tier"])
+        misses = CounterMetricFamily("cvhelper_cache_misses", "Cache misses.", labels=["cache"])
+        ratio = GaugeMetricFamily("cvhelper_cache_hit_ratio", "Hits over lookups since startup.", labels=["cache"])
+        for stats in all_cache_stats():
+            hits.add_metric([stats["name"], "memory"], stats["memory_hits"])
+            hits.add_metric([stats["name"], "disk"], stats["disk_hits"])
+            misses.add_metric([stats["name"]], stats["misses"])
+            ratio.add_metric([stats["name"]], stats["hit_ratio"])
+        yield hits
+        yield misses
+        yield ratio
+
+
+REGISTRY.register(_CacheCollector())
+
+
+def render() -> bytes:
+    """The current metrics in the Prometheus text format (media type CONTENT_TYPE_LATEST)."""
+    return generate_latest(REGISTRY)
@@ -15,6 +15,7 @@ const EvaluationTabsComponent = lazy(() => import('./components/EvaluationTabs')
 
 function App() {
   const [cvFile, setCvFile] = useState(null);
+  const [cvId, setCvId] = useState(null);
   const [jobUrls, setJobUrls] = useState(['']);
   const [jobDescriptions, setJobDescriptions] = useState(['']);
   const [apiKey, setApiKey] = useState('');
@@ -38,6 +39,27 @@ function App() {
 
   const handleCvChange = (e) => {
     setCvFile(e.target.files[0]);
+    setCvId(null);
+  };
+
+  // Upload the CV once; later evaluations reference it by ID instead of re-sending the file
+  const ensureCvId = async (forceUpload = false) => {
+    if (cvId && !forceUpload) {
+      return cvId;
+    }
+    const cvFormData = new FormData();
+    cvFormData.append('cv', cvFile);
+    const response = await fetch('http://localhost:8881/cvs', {
+      method: 'POST',
+      body: cvFormData,
+    });
+    if (!response.ok) {
+      const errorData = await response.json();
+      throw new Error(errorData.detail || 'Failed to upload CV');
+    }
+    const data = await response.json();
+    setCvId(data.cv_id);
+    return data.cv_id;
   };
 
   // Function to handle navigation
@@ -74,8 +96,6 @@ function App() {
     setLoading(true);
     setLoadingMessage('Preparing your data...');
     
-    formData.append('cv', cvFile);
-
     const validJobUrls = jobUrls.filter((url) => url.trim() !== '');
     if (validJobUrls.length > 0) {
       formData.append('job_urls', JSON.stringify(validJobUrls));
@@ -101,25 +121,64 @@ function App() {
     formData.append('api_key', apiKey);
 
     try {
+      const postEvaluation = async (id) => {
+        formData.set('cv_id', id);
+        return fetch('http://localhost:8881/evaluate/stream', {
+          method: 'POST',
+          body: formData,
+        });
+      };
+
       setLoadingMessage('Analyzing your resume against job requirements...');
-      
-      const response = await fetch('http://localhost:8881/evaluate', {
-        method: 'POST',
-        body: formData,
-      });
+      let response = await postEvaluation(await ensureCvId());
+
+      // The server may have lost the CV (deleted, expired or a new data directory); upload it again once
+      if (response.status === 404) {
+        setCvId(null);
+        response = await postEvaluation(await ensureCvId(true));
+      }
 
       if (!response.ok) {
         const errorData = await response.json();
         throw new Error(errorData.detail || 'Failed to evaluate');
       }
 
-      const data = await response.json();
-      if (data.evaluations) {
-        setEvaluations(data.evaluations);
-        setActiveTab(0);
-        toast.success(`Successfully evaluated ${data.evaluations.length} job matches!`);
-        // Switch to results view after successful evaluation
-        setCurrentView('results');
+      // The stream sends one JSON object per line: a "result" event for each job
+      // as soon as it finishes, then a final "summary" (or "error") event.
+      const totalJobs = validJobUrls.length + validJobDescriptions.length;
+      const received = [];
+      let shownResults = false;
+      const handleEvent = (event) => {
+        if (event.event === 'result') {
+          received[event.index] = event.evaluation;
+          setEvaluations(received.filter(Boolean));
+          setLoadingMessage(`Evaluated ${received.filter(Boolean).length} of ${totalJobs} jobs...`);
+          if (!shownResults) {
+            shownResults = true;
+            setActiveTab(0);
+            // Switch to results view as soon as the first evaluation arrives
+            setCurrentView('results');
+          }
+        } else if (event.event === 'summary') {
+          toast.success(`Successfully evaluated ${event.completed} job matches!`);
+        } else if (event.event === 'error') {
+          throw new Error(event.detail || 'Failed to evaluate');
+        }
+      };
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      for (;;) {
+        const { done, value } = await reader.read();
+        buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+        const lines = buffer.split('\n');
+        buffer = lines.pop();
+        lines.filter((line) => line.trim() !== '').forEach((line) => handleEvent(JSON.parse(line)));
+        if (done) break;
+      }
+      if (buffer.trim() !== '') {
+        handleEvent(JSON.parse(buffer));
       }
     } catch (error) {
       console.error("Error submitting data:", error);
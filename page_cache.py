@@ -0,0 +1,226 @@
+"""
+Fetching job pages through a persistent HTTP cache.
+
+Pages are keyed by normalised URL and stored with their ETag / Last-Modified
+validators. Within its domain's TTL a page is served straight from the cache.
+After that it is served stale while a conditional GET refreshes it in the
+background, for up to PAGE_CACHE_STALE_TTL seconds. Beyond that, for another
+PAGE_CACHE_REVALIDATE_TTL seconds, the caller waits for the conditional GET; a
+304 only costs a round trip, not a download.
+Downloads are streamed and size capped (see page_download.py). On the async
+path, cache reads and writes (whole pages, JSON encoded into SQLite) run in a
+worker thread so they never block the event loop.
+"""
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import config
+from cache import cache_key, page_cache_store
+from page_download import Download, download, download_sync
+from rate_limit import scrape_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+# Query parameters that only track the visitor and never change the page content
+TRACKING_PARAMS = {"fbclid", "gclid", "refid", "trackingid", "trk"}
+
+
+@dataclass
+class Page:
+    url: str
+    text: str
+    content_type: str
+    from_cache: bool = False
+    # True when the download stopped at PAGE_MAX_BYTES or PAGE_TEXT_BUDGET
+    truncated: bool = False
+
+
+def normalize_url(url: str) -> str:
+    """Lower-cases scheme and host, drops default ports, fragments and tracking parameters, sorts the query."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and not ((scheme == "http" and parts.port == 80) or (scheme == "https" and parts.port == 443)):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith("utm_")
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+def ttl_for(url: str) -> float:
+    host = (urlsplit(url).hostname or "").lower()
+    for domain, ttl in config.PAGE_CACHE_DOMAIN_TTLS.items():
+        if host == domain or host.endswith("." + domain):
+            return ttl
+    return config.PAGE_CACHE_TTL
+
+
+def _store_ttl(url: str) -> float:
+    """How long an entry is kept: fresh, then stale, then only for its validators."""
+    return ttl_for(url) + config.PAGE_CACHE_STALE_TTL + config.PAGE_CACHE_REVALIDATE_TTL
+
+
+def _conditional_headers(entry: Dict[str, Any]) -> Dict[str, str]:
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def _store(key: str, url: str, response: Download) -> Optional[Dict[str, Any]]:
+    """Saves a 200 response unless the server forbids it; returns the stored entry."""
+    store = page_cache_store()
+    if store is None or "no-store" in response.headers.get("Cache-Control", "").lower():
+        return None
+    entry = {
+        "url": url,
+        "text": response.text,
+        "content_type": response.headers.get("Content-Type", ""),
+        "truncated": response.truncated,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "fetched_at": time.time(),
+    }
+    store.set(key, entry, ttl=_store_ttl(url))
+    return entry
+
+
+def _apply_revalidation(key: str, url: str, entry: Dict[str, Any], response: Download) -> Dict[str, Any]:
+    """Handles the response to a conditional GET and returns the entry to serve."""
+    if response.status_code == 304:
+        entry = dict(entry, fetched_at=time.time())
+        entry["etag"] = response.headers.get("ETag", entry.get("etag"))
+        entry["last_modified"] = response.headers.get("Last-Modified", entry.get("last_modified"))
+        store = page_cache_store()
+        if store is not None:
+            store.set(key, entry, ttl=_store_ttl(url))
+        logger.debug(f"Page cache revalidated (304) {url}")
+        return entry
+    return _store(key, url, response) or _entry_from(url, response)
+
+
+def _entry_from(url: str, response: Download) -> Dict[str, Any]:
+    return {
+        "url": url,
+        "text": response.text,
+        "content_type": response.headers.get("Content-Type", ""),
+        "truncated": response.truncated,
+    }
+
+
+def _lookup(url: str) -> Tuple[str, Optional[Dict[str, Any]], float]:
+    """Returns (key, cached entry or None, age in seconds)."""
+    key = cache_key("page", normalize_url(url))
+    store = page_cache_store()
+    entry = store.get(key) if store is not None else None
+    age = time.time() - entry["fetched_at"] if entry else 0.0
+    return key, entry, age
+
+
+def _page(entry: Dict[str, Any], from_cache: bool) -> Page:
+    return Page(
+        url=entry["url"],
+        text=entry["text"],
+        content_type=entry["content_type"],
+        from_cache=from_cache,
+        truncated=entry.get("truncated", False),
+    )
+
+
+# --- Async path (FastAPI service) ---
+_refreshing: Set[str] = set()
+_refresh_tasks: Set[asyncio.Task] = set()
+
+
+async def _revalidate(key: str, url: str, entry: Dict[str, Any], headers: Dict[str, str], timeout: float) -> Dict[str, Any]:
+    await scrape_rate_limiter.acquire(url)
+    response = await download(url, {**headers, **_conditional_headers(entry)}, timeout)
+    return await asyncio.to_thread(_apply_revalidation, key, url, entry, response)
+
+
+async def _refresh_in_background(key: str, url: str, entry: Dict[str, Any], headers: Dict[str, str], timeout: float) -> None:
+    try:
+        await _revalidate(key, url, entry, headers, timeout)
+    except Exception as e:
+        logger.warning(f"Background revalidation of {url} failed: {e}")
+    finally:
+        _refreshing.discard(key)
+
+
+async def fetch_page(url: str, headers: Optional[Dict[str, str]] = None, timeout: float = 10.0) -> Page:
+    """
+    Returns the page at `url`, from the cache when possible. Raises httpx.HTTPError
+    when the page has to be fetched and the request fails.
+    """
+    headers = headers or {}
+    key, entry, age = await asyncio.to_thread(_lookup, url)
+    if entry is not None:
+        fresh_for = ttl_for(url)
+        if age < fresh_for:
+            logger.debug(f"Page cache hit (fresh) {url}")
+            return _page(entry, from_cache=True)
+        if age < fresh_for + config.PAGE_CACHE_STALE_TTL:
+            if key not in _refreshing:
+                _refreshing.add(key)
+                task = asyncio.create_task(_refresh_in_background(key, url, entry, headers, timeout))
+                _refresh_tasks.add(task)
+                task.add_done_callback(_refresh_tasks.discard)
+            logger.debug(f"Page cache hit (stale, revalidating) {url}")
+            return _page(entry, from_cache=True)
+        return _page(await _revalidate(key, url, entry, headers, timeout), from_cache=False)
+
+    await scrape_rate_limiter.acquire(url)
+    response = await download(url, headers, timeout)
+    stored = await asyncio.to_thread(_store, key, url, response)
+    return _page(stored or _entry_from(url, response), from_cache=False)
+
+
+# --- Sync path (LangChain tools) ---
+_refreshing_lock = threading.Lock()
+
+
+def _revalidate_sync(key: str, url: str, entry: Dict[str, Any], headers: Dict[str, str], timeout: float) -> Dict[str, Any]:
+    scrape_rate_limiter.acquire_sync(url)
+    response = download_sync(url, {**headers, **_conditional_headers(entry)}, timeout)
+    return _apply_revalidation(key, url, entry, response)
+
+
+def _refresh_in_thread(key: str, url: str, entry: Dict[str, Any], headers: Dict[str, str], timeout: float) -> None:
+    try:
+        _revalidate_sync(key, url, entry, headers, timeout)
+    except Exception as e:
+        logger.warning(f"Background revalidation of {url} failed: {e}")
+    finally:
+        with _refreshing_lock:
+            _refreshing.discard(key)
+
+
+def fetch_page_sync(url: str, headers: Optional[Dict[str, str]] = None, timeout: float = 25.0) -> Page:
+    """Blocking variant of `fetch_page`; stale pages are revalidated on a daemon thread."""
+    headers = headers or {}
+    key, entry, age = _lookup(url)
+    if entry is not None:
+        fresh_for = ttl_for(url)
+        if age < fresh_for:
+            return _page(entry, from_cache=True)
+        if age < fresh_for + config.PAGE_CACHE_STALE_TTL:
+            with _refreshing_lock:
+                start_refresh = key not in _refreshing
+                _refreshing.add(key)
+            if start_refresh:
+                threading.Thread(target=_refresh_in_thread, args=(key, url, entry, headers, timeout), daemon=True).start()
+            return _page(entry, from_cache=True)
+        return _page(_revalidate_sync(key, url, entry, headers, timeout), from_cache=False)
+
+    scrape_rate_limiter.acquire_sync(url)
+    response = download_sync(url, headers, timeout)
+    return _page(_store(key, url, response) or _entry_from(url, response), from_cache=False)
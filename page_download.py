@@ -0,0 +1,183 @@
+"""
+Size-capped, streamed page downloads.
+
+Some aggregator pages are several megabytes, while the extraction prompt only ever
+uses the first few thousand words of visible text. Pages are therefore streamed:
+bytes are decoded incrementally (charset from the Content-Type header, a BOM or a
+<meta> tag in the first bytes, else UTF-8), and an incremental HTML parser counts
+visible text as it arrives. The download stops as soon as PAGE_TEXT_BUDGET
+characters of visible text have been seen or PAGE_MAX_BYTES bytes have been read,
+which bounds both memory and transfer time per URL.
+"""
+import codecs
+import re
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Optional
+
+import httpx
+
+import config
+from http_client import get_async_client, get_sync_client
+from metrics import count_scrape_response
+from tracing import Span, span
+
+# Text inside these elements is never shown, so it does not count against the budget
+INVISIBLE_TAGS = {"script", "style", "noscript", "template", "head", "title", "svg"}
+# How far into the body to look for a <meta> charset declaration (the HTML spec says 1024 bytes)
+SNIFF_BYTES = 2048
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([A-Za-z0-9._:-]+)""", re.I)
+_BOMS = ((codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16"))
+
+
+@dataclass
+class Download:
+    status_code: int
+    headers: httpx.Headers
+    text: str
+    truncated: bool = False
+
+
+class _VisibleTextCounter(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.visible_chars = 0
+        self._hidden_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in INVISIBLE_TAGS:
+            self._hidden_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in INVISIBLE_TAGS and self._hidden_depth:
+            self._hidden_depth -= 1
+
+    def handle_data(self, data):
+        if not self._hidden_depth:
+            self.visible_chars += len(data.strip())
+
+
+def sniff_charset(content_type: str, head: bytes) -> str:
+    """Charset from the Content-Type header, else a BOM or <meta> tag in `head`, else UTF-8."""
+    for parameter in content_type.split(";")[1:]:
+        name, _, value = parameter.partition("=")
+        if name.strip().lower() == "charset" and value.strip():
+            return _known_codec(value.strip().strip("\"'"))
+    for bom, charset in _BOMS:
+        if head.startswith(bom):
+            return charset
+    match = _META_CHARSET.search(head[:SNIFF_BYTES])
+    if match:
+        return _known_codec(match.group(1).decode("ascii", errors="ignore"))
+    return "utf-8"
+
+
+def _known_codec(charset: str) -> str:
+    try:
+        return codecs.lookup(charset).name
+    except LookupError:
+        return "utf-8"
+
+
+class _CappedReader:
+    """Accumulates decoded text and reports when the page has been read far enough."""
+    def __init__(self, response: httpx.Response, max_bytes: int, text_budget: int):
+        self.response = response
+        self.max_bytes = max_bytes
+        self.text_budget = text_budget
+        self.is_html = "html" in response.headers.get("Content-Type", "html").lower()
+        self.bytes_read = 0
+        self.truncated = False
+        self._head = b""
+        self._decoder: Optional[codecs.IncrementalDecoder] = None
+        self._parts = []
+        self._counter = _VisibleTextCounter() if self.is_html else None
+
+    def feed(self, chunk: bytes) -> bool:
+        """Takes the next chunk; returns True once reading can stop."""
+        if self.bytes_read + len(chunk) > self.max_bytes:
+            chunk = chunk[:self.max_bytes - self.bytes_read]
+            self.truncated = True
+        self.bytes_read += len(chunk)
+        if self._decoder is None:
+            # Wait for enough bytes to find a <meta> charset before decoding anything
+            self._head += chunk
+            if len(self._head) < SNIFF_BYTES and not self.truncated:
+                return False
+            chunk, self._head = self._head, b""
+            charset = sniff_charset(self.response.headers.get("Content-Type", ""), chunk)
+            self._decoder = codecs.getincrementaldecoder(charset)(errors="replace")
+        self._add(self._decoder.decode(chunk))
+        if self._counter is not None and self._counter.visible_chars >= self.text_budget:
+            self.truncated = True
+        return self.truncated
+
+    def _add(self, text: str) -> None:
+        self._parts.append(text)
+        if self._counter is not None:
+            self._counter.feed(text)
+
+    def result(self) -> Download:
+        if self._decoder is None:
+            charset = sniff_charset(self.response.headers.get("Content-Type", ""), self._head)
+            self._decoder = codecs.getincrementaldecoder(charset)(errors="replace")
+            self._parts.append(self._decoder.decode(self._head))
+        self._parts.append(self._decoder.decode(b"", final=True))
+        return Download(self.response.status_code, self.response.headers, "".join(self._parts), self.truncated)
+
+
+def _reader(response: httpx.Response) -> _CappedReader:
+    return _CappedReader(response, config.PAGE_MAX_BYTES, config.PAGE_TEXT_BUDGET)
+
+
+async def download(url: str, headers: dict, timeout: float) -> Download:
+    """
+    GETs `url` through the shared async client, stopping early as described above.
+    A 304 is returned as is; other error statuses raise httpx.HTTPStatusError.
+    """
+    with span("download", url=url) as download_span:
+        try:
+            return await _download(url, headers, timeout, download_span)
+        except httpx.TransportError:
+            count_scrape_response(url, None)
+            raise
+
+
+async def _download(url: str, headers: dict, timeout: float, download_span: Span) -> Download:
+    async with get_async_client().stream("GET", url, headers=headers, timeout=timeout) as response:
+        count_scrape_response(url, response.status_code)
+        download_span.set(status_code=response.status_code, http_version=response.http_version)
+        if response.status_code == 304:
+            return Download(304, response.headers, "")
+        response.raise_for_status()
+        reader = _reader(response)
+        async for chunk in response.aiter_bytes():
+            if reader.feed(chunk):
+                break
+        download_span.set(bytes=reader.bytes_read, truncated=reader.truncated)
+        return reader.result()
+
+
+def download_sync(url: str, headers: dict, timeout: float) -> Download:
+    """Blocking variant of `download`."""
+    with span("download", url=url) as download_span:
+        try:
+            return _download_sync(url, headers, timeout, download_span)
+        except httpx.TransportError:
+            count_scrape_response(url, None)
+            raise
+
+
+def _download_sync(url: str, headers: dict, timeout: float, download_span: Span) -> Download:
+    with get_sync_client().stream("GET", url, headers=headers, timeout=timeout) as response:
+        count_scrape_response(url, response.status_code)
+        download_span.set(status_code=response.status_code, http_version=response.http_version)
+        if response.status_code == 304:
+            return Download(304, response.headers, "")
+        response.raise_for_status()
+        reader = _reader(response)
+        for chunk in response.iter_bytes():
+            if reader.feed(chunk):
+                break
+        download_span.set(bytes=reader.bytes_read, truncated=reader.truncated)
+        return reader.result()
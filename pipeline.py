@@ -0,0 +1,149 @@
+"""
+Staged async pipeline with bounded queues between stages.
+
+Each stage runs its own pool of worker tasks, so different items can be in
+different stages at the same time (page N+1 downloading while page N is being
+extracted and page N-1 is being scored). The bounded queues give backpressure:
+a fast stage cannot run more than a couple of items ahead of a slow one.
+"""
+import asyncio
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, List, Optional, Tuple
+
+
+@dataclass
+class Stage:
+    """
+    One pipeline step. With `batch_size` > 1 the handler receives a list of up to
+    `batch_size` values and must return a list of outputs in the same order; a worker
+    waits up to `batch_linger` seconds for a batch to fill before running it anyway.
+    """
+    name: str
+    handler: Callable[[Any], Awaitable[Any]]
+    workers: int = 1
+    batch_size: int = 1
+    batch_linger: float = 0.0
+
+
+class Done:
+    """
+    Wraps a stage output that is already final (for example an error result),
+    so the item skips the remaining stages.
+    """
+    def __init__(self, value: Any):
+        self.value = value
+
+
+class _Failure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+_STOP = object()
+_BATCH_POLL_INTERVAL = 0.05
+
+
+async def run_pipeline(
+    items: Iterable[Any],
+    stages: List[Stage],
+    queue_size: Optional[int] = None
+) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    Pushes `items` through `stages` and yields `(index, result)` pairs as soon as
+    each item completes, where `index` is the item's position in `items`.
+
+    `queue_size` bounds the queue in front of every stage; by default it holds two
+    batches per worker of that stage. If a handler raises, the remaining work is
+    cancelled and the exception is re-raised to the consumer.
+    """
+    if not stages:
+        raise ValueError("run_pipeline needs at least one stage")
+
+    queues = [asyncio.Queue(maxsize=queue_size or 2 * stage.workers * stage.batch_size) for stage in stages]
+    results: asyncio.Queue = asyncio.Queue()
+    last = len(stages) - 1
+
+    async def feed() -> None:
+        for index, item in enumerate(items):
+            await queues[0].put((index, item))
+        for _ in range(stages[0].workers):
+            await queues[0].put(_STOP)
+
+    async def next_batch(pos: int, stage: Stage) -> Tuple[List[Tuple[int, Any]], bool]:
+        """Returns up to `batch_size` queued entries and whether the stop marker was reached."""
+        loop = asyncio.get_running_loop()
+        entry = await queues[pos].get()
+        if entry is _STOP:
+            return [], True
+        batch = [entry]
+        deadline = loop.time() + stage.batch_linger
+        while len(batch) < stage.batch_size:
+            try:
+                entry = queues[pos].get_nowait()
+            except asyncio.QueueEmpty:
+                if loop.time() >= deadline:
+                    break
+                await asyncio.sleep(min(_BATCH_POLL_INTERVAL, max(0.0, deadline - loop.time())))
+                continue
+            if entry is _STOP:
+                return batch, True
+            batch.append(entry)
+        return batch, False
+
+    async def forward(pos: int, index: int, output: Any) -> None:
+        if isinstance(output, Done):
+            await results.put((index, output.value))
+        elif pos == last:
+            await results.put((index, output))
+        else:
+            await queues[pos + 1].put((index, output))
+
+    async def worker(pos: int, stage: Stage) -> None:
+        while True:
+            if stage.batch_size > 1:
+                batch, stopped = await next_batch(pos, stage)
+                if batch:
+                    outputs = await stage.handler([value for _, value in batch])
+                    if len(outputs) != len(batch):
+                        raise RuntimeError(f"Stage {stage.name} returned {len(outputs)} outputs for a batch of {len(batch)}")
+                    for (index, _), output in zip(batch, outputs):
+                        await forward(pos, index, output)
+                if stopped:
+                    return
+                continue
+
+            entry = await queues[pos].get()
+            if entry is _STOP:
+                return
+            index, value = entry
+            await forward(pos, index, await stage.handler(value))
+
+    async def run_stage(pos: int, stage: Stage) -> None:
+        await asyncio.gather(*(worker(pos, stage) for _ in range(stage.workers)))
+        if pos == last:
+            await results.put(_STOP)
+        else:
+            for _ in range(stages[pos + 1].workers):
+                await queues[pos + 1].put(_STOP)
+
+    def report_failure(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            results.put_nowait(_Failure(task.exception()))
+
+    tasks = [asyncio.create_task(feed())]
+    tasks += [asyncio.create_task(run_stage(pos, stage)) for pos, stage in enumerate(stages)]
+    for task in tasks:
+        task.add_done_callback(report_failure)
+
+    try:
+        while True:
+            entry = await results.get()
+            if entry is _STOP:
+                return
+            if isinstance(entry, _Failure):
+                raise entry.error
+            yield entry
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
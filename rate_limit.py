@@ -0,0 +1,95 @@
+"""
+Per-domain token-bucket rate limiting for page scrapes.
+
+Only requests to the same site wait for each other; a batch that mixes JobsDB,
+LinkedIn and other hosts is not slowed down by the politeness delay of any one of them.
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import config
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `burst` tokens, refilled at `rate` tokens per second.
+
+    `reserve` never sleeps. It takes a token (letting the balance go negative when
+    the bucket is empty) and returns how long the caller has to wait before using it,
+    so async callers can await that delay without holding a thread.
+    """
+    def __init__(self, rate: float, burst: int):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+
+class DomainRateLimiter:
+    def __init__(self, rate: float, burst: int, domain_limits: Optional[Dict[str, Tuple[float, int]]] = None):
+        self.rate = rate
+        self.burst = burst
+        self.domain_limits = {domain.lower(): limit for domain, limit in (domain_limits or {}).items()}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _bucket_for(self, url: str) -> Tuple[str, TokenBucket]:
+        host = (urlparse(url).hostname or "").lower()
+        key, (rate, burst) = host, (self.rate, self.burst)
+        for domain, limit in self.domain_limits.items():
+            if host == domain or host.endswith("." + domain):
+                key, (rate, burst) = domain, limit
+                break
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(rate, burst)
+        return key, bucket
+
+    def reserve(self, url: str) -> float:
+        """Takes a slot for `url`'s domain and returns the delay in seconds before it may be used."""
+        key, bucket = self._bucket_for(url)
+        delay = bucket.reserve()
+        if delay:
+            logger.debug(f"Rate limiting {key}: waiting {delay:.2f}s before fetching {url}")
+        return delay
+
+    async def acquire(self, url: str) -> None:
+        delay = self.reserve(url)
+        if delay:
+            with span("rate_limit_wait", url=url, seconds=round(delay, 3)):
+                await asyncio.sleep(delay)
+
+    def acquire_sync(self, url: str) -> None:
+        """Blocking variant for synchronous callers such as the LangChain tools."""
+        delay = self.reserve(url)
+        if delay:
+            with span("rate_limit_wait", url=url, seconds=round(delay, 3)):
+                time.sleep(delay)
+
+
+scrape_rate_limiter = DomainRateLimiter(
+    config.SCRAPE_RATE_PER_SECOND,
+    config.SCRAPE_BURST,
+    config.SCRAPE_DOMAIN_LIMITS,
+)
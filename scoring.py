@@ -0,0 +1,127 @@
+"""
+Response schemas for the evaluation prompts and server-side parsing of scores.
+
+The model is asked for JSON matching these schemas (Gemini enforces them through
+`response_schema`), and every response is still validated here before it is
+returned or cached: the schema fixes the shape but not the score ranges.
+"""
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+# Maximum points per rubric section
+SCORE_LIMITS = {"experience": 40, "skills": 40, "personality": 20}
+OVERALL_SCORE_LIMIT = 100
+
+_SECTION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "score": {"type": "integer"},
+        "explanation": {"type": "string"},
+    },
+    "required": ["score", "explanation"],
+}
+
+_EVALUATION_PROPERTIES = {
+    "overall_score": {"type": "integer"},
+    **{section: _SECTION_SCHEMA for section in SCORE_LIMITS},
+    "overall_explanation": {"type": "string"},
+}
+
+EVALUATION_SCHEMA = {
+    "type": "object",
+    "properties": _EVALUATION_PROPERTIES,
+    "required": list(_EVALUATION_PROPERTIES),
+}
+
+BATCH_EVALUATION_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {"job_number": {"type": "integer"}, **_EVALUATION_PROPERTIES},
+        "required": ["job_number", *_EVALUATION_PROPERTIES],
+    },
+}
+
+FUSED_EVALUATION_SCHEMA = {
+    "type": "object",
+    "properties": {"title": {"type": "string"}, "description": {"type": "string"}, **_EVALUATION_PROPERTIES},
+    "required": ["title", "description", *_EVALUATION_PROPERTIES],
+}
+
+
+def strip_json_fences(response_text: str) -> str:
+    """Returns the JSON inside a ```json ... ``` block, or the whole text if there is no fence."""
+    text = response_text.strip()
+    fenced = re.search(r'```(?:json)?\s*(.*?)\s*```', text, re.DOTALL)
+    return fenced.group(1) if fenced else text
+
+
+def _score(value: Any, limit: int, field: str) -> int:
+    # bool is an int subclass, but true/false is never a valid score
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value != int(value):
+        raise ValueError(f"{field} must be a whole number, got {value!r}")
+    if not 0 <= value <= limit:
+        raise ValueError(f"{field} must be between 0 and {limit}, got {value}")
+    return int(value)
+
+
+def validate_evaluation(item: Any) -> Dict[str, Any]:
+    """
+    Checks one evaluation object against the rubric and returns it with only the
+    schema's fields, scores as ints. Raises ValueError describing the first problem.
+    """
+    if not isinstance(item, dict):
+        raise ValueError("evaluation must be a JSON object")
+    evaluation = {"overall_score": _score(item.get("overall_score"), OVERALL_SCORE_LIMIT, "overall_score")}
+    for section, limit in SCORE_LIMITS.items():
+        part = item.get(section)
+        if not isinstance(part, dict):
+            raise ValueError(f"{section} must be an object with score and explanation")
+        explanation = part.get("explanation")
+        if not isinstance(explanation, str):
+            raise ValueError(f"{section}.explanation must be a string")
+        evaluation[section] = {"score": _score(part.get("score"), limit, f"{section}.score"), "explanation": explanation}
+    overall_explanation = item.get("overall_explanation")
+    if not isinstance(overall_explanation, str):
+        raise ValueError("overall_explanation must be a string")
+    evaluation["overall_explanation"] = overall_explanation
+    return evaluation
+
+
+def parse_evaluation(response_text: str) -> Dict[str, Any]:
+    """Parses and validates a single evaluation response. Raises ValueError if it is malformed."""
+    try:
+        item = json.loads(strip_json_fences(response_text))
+    except json.JSONDecodeError as e:
+        raise ValueError(f"response is not valid JSON: {e}")
+    return validate_evaluation(item)
+
+
+def format_evaluation(evaluation: Dict[str, Any]) -> str:
+    """The `score_and_explanation` string returned to clients and stored in the caches."""
+    return json.dumps(evaluation, indent=2, ensure_ascii=False)
+
+
+def score_fields(score_and_explanation: str) -> Dict[str, Optional[int]]:
+    """
+    Typed score fields for an EvaluationResult; all None when the text is an error
+    message or otherwise not a valid evaluation.
+    """
+    try:
+        evaluation = parse_evaluation(score_and_explanation)
+    except ValueError:
+        return {"overall_score": None, **{f"{section}_score": None for section in SCORE_LIMITS}}
+    return {
+        "overall_score": evaluation["overall_score"],
+        **{f"{section}_score": evaluation[section]["score"] for section in SCORE_LIMITS},
+    }
+
+
+def rank_indices(scores: List[Optional[int]], top_k: Optional[int] = None) -> List[int]:
+    """
+    Positions of `scores` from best to worst, unscored (failed) entries last and
+    ties in their original order, cut to the first `top_k` when given.
+    """
+    order = sorted(range(len(scores)), key=lambda i: (scores[i] is None, -(scores[i] or 0), i))
+    return order[:top_k] if top_k is not None else order
@@ -0,0 +1,120 @@
+"""
+Per-request timing breakdown for the Server-Timing response header.
+
+/evaluate starts a RequestTimings for the request; the stage timers in api.py
+add to it from anywhere in the request's context, including pipeline worker
+tasks and threadpool calls. The header then tells browser devtools and
+synthetic probes where a slow response spent its time, without server logs:
+
+    Server-Timing: cv;desc="CV parse";dur=3.1, scrape;desc="Page fetches";dur=812.4, ...,
+                   cache;desc="4/6 hits", total;dur=2310.7
+
+Stage durations are summed over jobs, so with several jobs in flight they can
+add up to more than "total", the request's wall time.
+
+Work shared between concurrent requests (single-flight scrapes and extractions)
+runs once, outside any one request. It collects its timings with `collect_shared`,
+and every request that waited for it adds them with `record_shared`, so a request
+that joined another's scrape still reports the time it spent waiting for it.
+"""
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Dict, Optional, Tuple
+
+# (header name, description, stages summed into it)
+METRICS = (
+    ("cv", "CV parse", ("docx_parse",)),
+    ("scrape", "Page fetches", ("scrape",)),
+    ("parse", "HTML parsing", ("html_parse",)),
+    ("llm", "Gemini calls", ("extraction_llm", "evaluation_llm")),
+    ("queue", "Waiting for pipeline workers", ("queue",)),
+)
+
+_current: ContextVar[Optional["RequestTimings"]] = ContextVar("request_timings", default=None)
+
+
+class RequestTimings:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.cache_hits = 0
+        self.cache_lookups = 0
+        self._durations: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self._durations[stage] = self._durations.get(stage, 0.0) + seconds
+
+    def count_cache_lookup(self, hit: bool, lookups: int = 1) -> None:
+        with self._lock:
+            self.cache_lookups += lookups
+            self.cache_hits += hit * lookups
+
+    def durations(self) -> Dict[str, float]:
+        """Seconds per stage."""
+        with self._lock:
+            return dict(self._durations)
+
+    def milliseconds(self) -> Dict[str, float]:
+        """Duration per header metric plus "total", in milliseconds."""
+        with self._lock:
+            durations = dict(self._durations)
+        timings = {name: sum(durations.get(stage, 0.0) for stage in stages) * 1000 for name, _, stages in METRICS}
+        timings["total"] = (time.perf_counter() - self.start) * 1000
+        return timings
+
+    def header(self) -> str:
+        timings = self.milliseconds()
+        entries = [f'{name};desc="{description}";dur={timings[name]:.1f}' for name, description, _ in METRICS]
+        entries.append(f'cache;desc="{self.cache_hits}/{self.cache_lookups} hits"')
+        entries.append(f"total;dur={timings['total']:.1f}")
+        return ", ".join(entries)
+
+
+def start_request_timings() -> RequestTimings:
+    """Starts collecting timings for the current request; only call it from an endpoint."""
+    timings = RequestTimings()
+    _current.set(timings)
+    return timings
+
+
+def record(stage: str, seconds: float) -> None:
+    timings = _current.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+
+def record_cache_lookup(hit: bool) -> None:
+    timings = _current.get()
+    if timings is not None:
+        timings.count_cache_lookup(hit)
+
+
+async def collect_shared(work: Awaitable[Any]) -> Tuple[Any, RequestTimings]:
+    """Awaits `work` with its timings collected apart from the current request's; returns both."""
+    timings = RequestTimings()
+    token = _current.set(timings)
+    try:
+        return await work, timings
+    finally:
+        _current.reset(token)
+
+
+def record_shared(shared: RequestTimings, waited: float, wait_stage: str) -> None:
+    """
+    Adds shared work to the current request: its cache lookups, and the `waited` seconds
+    split over the work's own stages, with whatever is left under `wait_stage`.
+    """
+    timings = _current.get()
+    if timings is None:
+        return
+    remaining = waited
+    for stage, seconds in shared.durations().items():
+        if stage != wait_stage:
+            seconds = min(seconds, remaining)
+            timings.add(stage, seconds)
+            remaining -= seconds
+    timings.add(wait_stage, remaining)
+    timings.count_cache_lookup(True, shared.cache_hits)
+    timings.count_cache_lookup(False, shared.cache_lookups - shared.cache_hits)
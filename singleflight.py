@@ -0,0 +1,56 @@
+"""
+Coalescing of identical in-flight async calls.
+
+When a posting is shared around, several requests often scrape and extract the
+same URL at the same moment. With `SingleFlight.do` the first caller for a key
+starts the work and every concurrent caller with the same key awaits that same
+result, so a burst of N identical calls costs one fetch and one LLM call.
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._counters = {"calls": 0, "coalesced": 0, "retried": 0}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]], retry_if: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        Returns the result of `fn()`, sharing one execution among concurrent callers
+        with the same `key`. Exceptions are raised to every caller. The work runs in
+        its own task, so a caller that is cancelled does not cancel it for the others.
+
+        A caller that joined another's call and gets a result matching `retry_if`
+        runs its own `fn()` instead, for results that may be specific to the caller
+        that started the call (such as an error from its API key).
+        """
+        self._counters["calls"] += 1
+        task = self._inflight.get(key)
+        joined = task is not None
+        if task is None:
+            task = asyncio.create_task(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._forget(key, task))
+        else:
+            self._counters["coalesced"] += 1
+            logger.info(f"Single-flight {self.name}: joined an in-flight call")
+        result = await asyncio.shield(task)
+        if joined and retry_if is not None and retry_if(result):
+            self._counters["retried"] += 1
+            logger.info(f"Single-flight {self.name}: shared result not usable, calling again")
+            return await fn()
+        return result
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # Mark as retrieved even if every caller was cancelled
+
+    def stats(self) -> Dict[str, Any]:
+        return {"name": self.name, **self._counters, "in_flight": len(self._inflight)}
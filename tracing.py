@@ -0,0 +1,215 @@
+"""
+Lightweight per-request tracing.
+
+A span records one timed step (a request, a job, a scrape, an LLM call) with its
+attributes: URL, bytes downloaded, tokens used and so on. Spans nest through a
+context variable, so a span opened while another is active becomes its child,
+also inside asyncio tasks and threadpool calls started from it. Spans that
+outlive a single `with` block, such as a job travelling through the pipeline
+stages, are started with `start_span` and passed explicitly as `parent`.
+
+Finished spans go to the configured exporter (TRACE_EXPORTER):
+
+- "jsonl": one JSON object per line in TRACE_PATH, rotated to TRACE_PATH + ".1"
+  once it reaches TRACE_FILE_MAX_BYTES
+- "none":  tracing is off and spans cost next to nothing
+
+Other exporters subclass SpanExporter and are installed with `set_exporter`.
+Slow requests can then be inspected as a waterfall:
+
+    python tracing.py data/traces.jsonl            # slowest trace in the file
+    python tracing.py data/traces.jsonl <trace_id>
+"""
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+import config
+
+_current: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+# Default for `parent`: whichever span is active where the span starts
+_ACTIVE = object()
+
+
+class Span:
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = parent.trace_id if parent is not None else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent is not None else None
+        self.attributes = dict(attributes)
+        self.start_time = time.time()
+        self.duration: Optional[float] = None
+        self.error: Optional[str] = None
+        self._start = time.perf_counter()
+
+    @property
+    def ended(self) -> bool:
+        return self.duration is not None
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def end(self, error: Optional[str] = None, **attributes: Any) -> None:
+        """Records the span's duration and exports it; later calls are ignored."""
+        if self.ended:
+            return
+        self.duration = time.perf_counter() - self._start
+        self.error = error
+        self.attributes.update(attributes)
+        exporter = _exporter
+        if exporter is not None:
+            exporter.export(self.to_dict())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start_time,
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def start_span(name: str, parent: Any = _ACTIVE, **attributes: Any) -> Span:
+    """Starts a span without activating it; the caller must call `end()`."""
+    return Span(name, current_span() if parent is _ACTIVE else parent, attributes)
+
+
+@contextmanager
+def span(name: str, parent: Any = _ACTIVE, **attributes: Any) -> Iterator[Span]:
+    """Runs the block inside a new active span, which records any exception as its error."""
+    current = start_span(name, parent, **attributes)
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.end(error=f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        _current.reset(token)
+        current.end()
+
+
+class SpanExporter:
+    def export(self, span: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class JsonLinesExporter(SpanExporter):
+    def __init__(self, path: str, max_bytes: int):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def export(self, span: Dict[str, Any]) -> None:
+        line = json.dumps(span, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            if self._file.closed:
+                return
+            if self.max_bytes and self._file.tell() + len(line) > self.max_bytes:
+                self._file.close()
+                os.replace(self.path, self.path + ".1")
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+_exporter: Optional[SpanExporter] = None
+
+
+def set_exporter(exporter: Optional[SpanExporter]) -> None:
+    """Installs `exporter` for all spans ending from now on; None turns tracing off."""
+    global _exporter
+    previous, _exporter = _exporter, exporter
+    if previous is not None and previous is not exporter:
+        previous.close()
+
+
+def configure() -> None:
+    """Installs the exporter selected by TRACE_EXPORTER."""
+    if config.TRACE_EXPORTER == "jsonl":
+        set_exporter(JsonLinesExporter(config.TRACE_PATH, config.TRACE_FILE_MAX_BYTES))
+    elif config.TRACE_EXPORTER == "none":
+        set_exporter(None)
+    else:
+        raise ValueError(f"Unknown TRACE_EXPORTER {config.TRACE_EXPORTER!r}; expected 'jsonl' or 'none'")
+
+
+def format_waterfall(spans: List[Dict[str, Any]], width: int = 40) -> str:
+    """Renders one trace's spans as an indented tree with a bar per span on a shared time axis."""
+    if not spans:
+        return ""
+    by_parent: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    ids = {item["span_id"] for item in spans}
+    for item in sorted(spans, key=lambda item: item["start"]):
+        parent = item["parent_id"] if item["parent_id"] in ids else None
+        by_parent.setdefault(parent, []).append(item)
+    origin = min(item["start"] for item in spans)
+    total = max(item["start"] + (item["duration_ms"] or 0) / 1000 for item in spans) - origin or 1e-9
+
+    lines = []
+
+    def walk(parent: Optional[str], depth: int) -> None:
+        for item in by_parent.get(parent, []):
+            offset = int((item["start"] - origin) / total * width)
+            length = max(1, int((item["duration_ms"] or 0) / 1000 / total * width))
+            bar = " " * offset + "#" * min(length, width - offset)
+            attributes = " ".join(f"{key}={value}" for key, value in item["attributes"].items())
+            error = f" ERROR {item['error'].splitlines()[0]}" if item["error"] else ""
+            lines.append(f"{bar:<{width}} {item['duration_ms'] or 0:>10.1f} ms  {'  ' * depth}{item['name']} {attributes}{error}")
+            walk(item["span_id"], depth + 1)
+
+    walk(None, 0)
+    return "\n".join(lines)
+
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit("usage: python tracing.py TRACE_FILE [TRACE_ID]")
+    traces: Dict[str, List[Dict[str, Any]]] = {}
+    with open(sys.argv[1], encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                traces.setdefault(item["trace_id"], []).append(item)
+    if len(sys.argv) > 2:
+        trace_id = sys.argv[2]
+    else:
+        # The slowest trace, judged by its root span
+        roots = [item for spans in traces.values() for item in spans if item["parent_id"] is None]
+        if not roots:
+            sys.exit("no traces found")
+        trace_id = max(roots, key=lambda item: item["duration_ms"] or 0)["trace_id"]
+    if trace_id not in traces:
+        sys.exit(f"trace {trace_id} not found")
+    print(f"Trace {trace_id}")
+    print(format_waterfall(traces[trace_id]))
+
+
+if __name__ == "__main__":
+    main()